@@ -8,7 +8,6 @@ import scipy as sp
 import numpy.random
 import scipy.linalg as sla
 import numpy.linalg as nla
-import scipy.stats as ss
 
 
 from scipy.linalg import svd
@@ -33,17 +32,52 @@ from numpy import \
 import sys
 assert sys.version_info >= (3,5)
 import os.path
+import tempfile
 from time import sleep
 from collections import OrderedDict
 import warnings
 import traceback
 import re
 import functools
-
-# Pandas changes numpy's error settings. Correct.
+import importlib
+import inspect
+
+class LazyModule:
+  """
+  Stand-in for a module, which only gets imported upon first attribute access,
+  followed by the (optional) init(module).
+  Other LazyModules (deps) may be required to be loaded first.
+  This keeps 'from common import *' fast and headless (e.g. for batch workers),
+  since the plotting and pandas modules are imported only if they get used.
+  """
+  def __init__(self,name,init=None,deps=()):
+    self._name = name
+    self._init = init
+    self._deps = deps
+    self._mod  = None
+  def _load(self):
+    if self._mod is None:
+      for dep in self._deps:
+        dep._load()
+      self._mod = importlib.import_module(self._name)
+      if self._init is not None:
+        self._init(self._mod)
+    return self._mod
+  def __getattr__(self,attr):
+    return getattr(self._load(),attr)
+  def __dir__(self):
+    return dir(self._load())
+  def __repr__(self):
+    status = 'imported' if self._mod is not None else 'not yet imported'
+    return "<LazyModule '"+self._name+"' ("+status+")>"
+
+ss = LazyModule('scipy.stats')
+
+def _init_pd(pd):
+  # Pandas changes numpy's error settings. Correct.
+  np.seterr(**olderr)
 olderr = np.geterr()
-import pandas as pd
-np.seterr(**olderr)
+pd = LazyModule('pandas', _init_pd)
 
 # Profiling
 import builtins
@@ -76,8 +110,6 @@ def user_is_patrick():
   import getpass
   return getpass.getuser() == 'pataan'
 
-import matplotlib as mpl
-
 # is_notebook 
 try:
   __IPYTHON__
@@ -86,30 +118,40 @@ try:
 except (NameError,ImportError):
   is_notebook = False
 
-# Choose graphics backend.
-if is_notebook:
-  mpl.use('nbAgg') # interactive
-else:
-  # terminal frontent
-  if user_is_patrick():
-    from sys import platform
-    if platform == 'darwin':
-      mpl.use('MacOSX') # prettier, stable, fast (notable in LivePlot)
-      #mpl.use('Qt4Agg') # deprecated
-
-      # Has geometry(placement). Causes warning
-      #mpl.use('TkAgg')  
-      #import matplotlib.cbook
-      #warnings.filterwarnings("ignore",category=matplotlib.cbook.mplDeprecation)
-    else:
-      pass
-
-# Get Matlab-like interface, and enable interactive plotting
-import matplotlib.pyplot as plt 
-plt.ion()
-
-# Styles, e.g. 'fivethirtyeight', 'bmh', 'seaborn-darkgrid'
-plt.style.use(['seaborn-darkgrid','tools/DAPPER.mplstyle'])
+# NB: matplotlib (mpl) and pyplot (plt) are only imported (and configured)
+#     upon first use. To do so explicitly, use mpl._load() or plt._load().
+def _init_mpl(mpl):
+  # Choose graphics backend.
+  if is_notebook:
+    mpl.use('nbAgg') # interactive
+  else:
+    # terminal frontent
+    if user_is_patrick():
+      from sys import platform
+      if platform == 'darwin':
+        mpl.use('MacOSX') # prettier, stable, fast (notable in LivePlot)
+        #mpl.use('Qt4Agg') # deprecated
+
+        # Has geometry(placement). Causes warning
+        #mpl.use('TkAgg')  
+        #import matplotlib.cbook
+        #warnings.filterwarnings("ignore",category=matplotlib.cbook.mplDeprecation)
+      else:
+        pass
+  # Load DAPPER colors into matplotlib
+  register_colors()
+
+def _init_plt(plt):
+  import mpl_toolkits.mplot3d # Register '3d' projection
+  # Enable interactive plotting
+  plt.ion()
+  # Styles, e.g. 'fivethirtyeight', 'bmh', 'seaborn-darkgrid'
+  plt.style.use(['seaborn-darkgrid',
+    os.path.join(os.path.dirname(__file__),'tools','DAPPER.mplstyle')])
+
+mpl = LazyModule('matplotlib', _init_mpl)
+# Get Matlab-like interface
+plt = LazyModule('matplotlib.pyplot', _init_plt, deps=[mpl])
 
 
 
@@ -126,9 +168,12 @@ from tools.matrices import *
 from tools.randvars import *
 from tools.viz import *
 from stats import *
+from tools.caching import *
 from tools.admin import *
+from tools.checkpoint import *
 from tools.convenience import *
 from tools.data_management import *
+from tools.tuning import *
 from da_methods import *
 
 
@@ -101,6 +101,8 @@ def EnKF_analysis(E,hE,hnoise,y,upd_a,stats,kObs):
           Pw    = V@diag(d**(-1.0))@V.T
           HK    = R.inv @ Y.T @ (V@ diag(d**(-1)) @V.T) @ Y
         w = dy @ R.inv @ Y.T @ Pw
+        # Apply the transforms in the precision of the ensemble
+        w, T = w.astype(A.dtype,copy=False), T.astype(A.dtype,copy=False)
         E = mu + w@A + T@A
     elif 'Serial' in upd_a:
         # Observations assimilator one-at-a-time.
@@ -140,6 +142,7 @@ def EnKF_analysis(E,hE,hnoise,y,upd_a,stats,kObs):
 
 
 
+@timed('post_process')
 def post_process(E,infl,rot):
   """
   Inflate, Rotate.
@@ -152,20 +155,19 @@ def post_process(E,infl,rot):
 
   if do_infl or rot:
     A, mu = anom(E)
-    N,m   = E.shape
-    T     = eye(N)
 
     if do_infl:
-      T = infl * T
+      A = infl * A
 
     if rot:
-      T = genOG_1(N,rot) @ T
+      A = rotate_anoms(A,rot)
 
-    E = mu + T@A
+    E = mu + A
   return E
 
 
 
+@timed('noise')
 def add_noise(E, dt, noise, config):
   """
   Treatment of additive noise for ensembles.
@@ -181,25 +183,31 @@ def add_noise(E, dt, noise, config):
 
   N,m  = E.shape
   A,mu = anom(E)
+  # NB: The static factors (Left, full, diag) are memoized by CovMat,
+  # i.e. they only get computed once per experiment.
   Q12  = noise.C.Left
-  Q    = noise.C.full
+
+  if N<=m and method.startswith('Sqrt'):
+    # Thin svd of the anomalies, shared by the Sqrt-* methods.
+    # It replaces tinv(A.T), and provides the svd of Q_hat12 (below)
+    # in terms of the (small) coefficient matrix UQ.
+    V,s,UT = tsvd(A)
+    UQ     = UT@Q12                 # Q12 in the ensemble subspace
+    Qa12   = (V*s**(-1.0)) @ UQ     # = tinv(A.T) @ Q12
 
   def sqrt_core():
     T    = np.nan # cause error if used
-    Qa12 = np.nan # cause error if used
     A2   = A.copy() # Instead of using (the implicitly nonlocal) A,
     # which changes A outside as well. NB: This is a bug in Datum!
     if N<=m:
-      Ainv = tinv(A2.T)
-      Qa12 = Ainv@Q12
       T    = funm_psd(eye(N) + dt*(N-1)*(Qa12@Qa12.T), sqrt)
       A2   = T@A2
     else: # "Left-multiplying" form
       P = A2.T @ A2 /(N-1)
-      L = funm_psd(eye(m) + dt*mrdiv(Q,P), sqrt)
+      L = funm_psd(eye(m) + dt*mrdiv(noise.C.full,P), sqrt)
       A2= A2 @ L.T
     E = mu + A2
-    return E, T, Qa12
+    return E, T
 
   if method == 'Stoch':
     # In-place addition works (also) for empty [] noise sample.
@@ -208,34 +216,33 @@ def add_noise(E, dt, noise, config):
     pass
   elif method == 'Mult-1':
     varE   = np.var(E,axis=0,ddof=1).sum()
-    ratio  = (varE + dt*diag(Q).sum())/varE
+    ratio  = (varE + dt*noise.C.diag.sum())/varE
     E      = mu + sqrt(ratio)*A
     E      = reconst(*tsvd(E,0.999)) # Explained in Datum
   elif method == 'Mult-m':
     varE   = np.var(E,axis=0)
-    ratios = sqrt( (varE + dt*diag(Q))/varE )
+    ratios = sqrt( (varE + dt*noise.C.diag)/varE )
     E      = mu + A*ratios
     E      = reconst(*tsvd(E,0.999)) # Explained in Datum
   elif method == 'Sqrt-Core':
     E = sqrt_core()[0]
   elif method == 'Sqrt-Add-Z':
-    E, _, Qa12 = sqrt_core()
+    E, _ = sqrt_core()
     if N<=m:
-      Z  = Q12 - A.T@Qa12
+      Z  = Q12 - UT.T@UQ # = Q12 - A.T@Qa12
       E += sqrt(dt)*(Z@randn((Z.shape[1],N))).T
   elif method == 'Sqrt-Dep':
-    E, T, Qa12 = sqrt_core()
+    E, T = sqrt_core()
     if N<=m:
-      # Q_hat12: reuse svd for both inversion and projection.
-      Q_hat12      = A.T @ Qa12
-      U,s,VT       = tsvd(Q_hat12,0.99)
-      Q_hat12_inv  = (VT.T * s**(-1.0)) @ U.T
-      Q_hat12_proj = VT.T@VT
+      # Q_hat12 = A.T@Qa12 = UT.T@UQ. Its svd is obtained from that of UQ,
+      # which is reused for both inversion and projection.
+      W,sQ,ZT      = tsvd(UQ,0.99)
+      Q_hat12_proj = ZT.T@ZT
       rQ = Q12.shape[1]
       # Calc D_til
-      Z      = Q12 - Q_hat12
-      D_hat  = A.T@(T-eye(N))
-      Xi_hat = Q_hat12_inv @ D_hat
+      Z      = Q12 - UT.T@UQ # = Q12 - Q_hat12
+      # Xi_hat = Q_hat12_inv @ A.T@(T-eye(N)), where UT@A.T = (V*s).T
+      Xi_hat = (ZT.T * sQ**(-1.0)) @ W.T @ (V*s).T @ (T-eye(N))
       Xi_til = (eye(rQ) - Q_hat12_proj)@randn((rQ,N))
       D_til  = Z@(Xi_hat + sqrt(dt)*Xi_til)
       E     += D_til.T
@@ -360,7 +367,7 @@ def serial_inds(upd_a, y, cvR, A):
       dC = np.sum(A*A,0)/(N-1)
     inds = np.argsort(dC)
   else: # Default: random ordering
-    inds = np.random.permutation(len(y))
+    inds = rng().permutation(len(y))
   return inds
 
 @DA_Config
@@ -759,6 +766,8 @@ def EnKF_N(N,dual=True,Hess=False,g=0,xN=1.0,infl=1.0,rot=False,**kwargs):
           Hw    = Y@R.inv@Y.T/N1 + eye(N) - 2*np.outer(w,w)/(eN + w@w)
           T     = funm_psd(Hw, lambda x: x**-.5) # is there a sqrtm Woodbury?
           
+        # Apply the transforms in the precision of the ensemble
+        w, T = w.astype(A.dtype,copy=False), T.astype(A.dtype,copy=False)
         E = mu + w@A + T@A
         E = post_process(E,infl,rot)
 
@@ -1641,7 +1650,7 @@ def _resample(w,kind,N_o,N):
   "Core functionality for resample(). See its docstring."
   if kind in ['Stochastic','Stoch']:
     # van Leeuwen [2] also calls this "probabilistic" resampling
-    idx = np.random.choice(N_o,N,replace=True,p=w)
+    idx = rng().choice(N_o,N,replace=True,p=w)
     # np.random.multinomial is faster (slightly different usage) ?
   elif kind in ['Residual','Res']:
     # Doucet [1] also calls this "stratified" resampling.
@@ -1654,7 +1663,7 @@ def _resample(w,kind,N_o,N):
     # Multinomial sampling of decimal parts
     N_I   = w_I.sum() # == len(idx_I)
     N_D   = N - N_I
-    idx_D = np.random.choice(N_o,N_D,replace=True,p=w_D/w_D.sum())
+    idx_D = rng().choice(N_o,N_D,replace=True,p=w_D/w_D.sum())
     # Concatenate
     idx   = np.hstack((idx_I,idx_D))
   elif kind in ['Systematic','Sys']:
@@ -1775,13 +1784,13 @@ def OptInterp(**kwargs):
     muC = mean(xx,0)
     AC  = xx - muC
     PC  = (AC.T @ AC) / (xx.shape[0] - 1)
-    KG  = mrdiv(PC@H.T, H@PC@H.T + h.noise.C.full)
+    KG, trKHP = scaled_gain(PC,H,h.noise.C)(1.0)
 
     # Setup scalar "time-series" covariance dynamics.
     # ONLY USED FOR DIAGNOSTICS, not to change the Kalman gain.
-    Pa    = (eye(f.m) - KG@H) @ PC
-    CorrL = estimate_corr_length(AC.ravel(order='F'))
-    WaveC = wave_crest(trace(Pa)/trace(2*PC),CorrL)
+    trPC  = trace(PC)
+    CorrL = estimate_corr_length(AC)
+    WaveC = wave_crest((trPC-trKHP)/(2*trPC),CorrL)
 
     # Init
     mu = muC
@@ -1793,7 +1802,7 @@ def OptInterp(**kwargs):
       if kObs is not None:
         stats.assess(k,kObs,'f',mu=muC,Cov=PC)
         # Analysis
-        mu = muC + KG@(yy[kObs] - h(muC,t))
+        mu = muC + KG(yy[kObs] - h(muC,t))
       stats.assess(k,kObs,mu=mu,Cov=2*PC*WaveC(k,kObs))
   return assimilator
 
@@ -1815,34 +1824,37 @@ def Var3D(infl=1.0,**kwargs):
     muC = mean(xx,0)
     AC  = xx - muC
     PC  = (AC.T @ AC)/(xx.shape[0] - 1)
+    trPC = trace(PC)
 
     # Setup scalar "time-series" covariance dynamics
-    CorrL = estimate_corr_length(AC.ravel(order='F'))
+    CorrL = estimate_corr_length(AC)
     WaveC = wave_crest(0.5,CorrL) # Nevermind careless W0 init
 
     # Init
     mu = muC
-    P  = PC
-    stats.assess(0,mu=mu,Cov=P)
+    stats.assess(0,mu=mu,Cov=PC)
 
+    H = None
     for k,kObs,t,dt in progbar(chrono.forecast_range):
       # Forecast
       mu = f(mu,t-dt,dt)
-      P  = 2*PC*WaveC(k)
+      c  = 2*WaveC(k)
 
       if kObs is not None:
-        stats.assess(k,kObs,'f',mu=mu,Cov=P)
-        # Analysis
-        P *= infl
-        H  = h.jacob(mu,t)
-        KG = mrdiv(P@H.T, H@P@H.T + h.noise.C.full)
-        KH = KG@H
-        mu = mu + KG@(yy[kObs] - h(mu,t))
+        stats.assess(k,kObs,'f',mu=mu,Cov=c*PC)
+        # Analysis. Since P = c*PC, only refactorize if H changes.
+        c *= infl
+        Hk = h.jacob(mu,t)
+        if H is None or not np.array_equal(H,Hk):
+          H    = Hk
+          gain = scaled_gain(PC,H,h.noise.C)
+        KG, trKHP = gain(c)
+        mu = mu + KG(yy[kObs] - h(mu,t))
 
         # Re-calibrate wave_crest with new W0 = Pa/(2*PC).
         # Note: obs innovations are not used to estimate P!
-        Pa    = (eye(f.m) - KH) @ P
-        WaveC = wave_crest(trace(Pa)/trace(2*PC),CorrL)
+        trPa  = c*trPC - trKHP
+        WaveC = wave_crest(trPa/(2*trPC),CorrL)
 
       stats.assess(k,kObs,mu=mu,Cov=2*PC*WaveC(k,kObs))
   return assimilator
@@ -1933,6 +1945,31 @@ def wave_crest(W0,L):
   return W
 
 
+def scaled_gain(PC,H,R):
+  """
+  Kalman gain for the prior covariance P = c*PC, for any scalar c.
+
+  Factorizes PC@H.T and the (R-whitened) H@PC@H.T once,
+  so that the gain need not be recomputed for each new c,
+  which is the case in Var3D (where c is given by wave_crest).
+  Returns function gain(c) -> (KG, trace(KG@H@P)),
+  where KG is a function: KG(dy) = K(c)@dy, costing O(p*m).
+  """
+  Rm12    = R.sym_sqrt_inv
+  PCHt    = PC @ H.T
+  lam, V  = eigh(Rm12 @ H @ PCHt @ Rm12.T)
+  lam     = lam.clip(min=0)
+  W       = V.T @ Rm12
+  G       = PCHt @ W.T
+  g2      = np.sum(G**2,0)
+  # With d = c/(c*lam+1): K(c) = G@diag(d)@W, and trace(K@H@P) = c*d@g2.
+  def gain(c):
+    d  = c/(c*lam + 1)
+    KG = lambda dy: G @ (d * (W @ dy))
+    return KG, c*(d@g2)
+  return gain
+
+
 # TODO: Clean up
 @DA_Config
 def ExtRTS(infl=1.0,**kwargs):
@@ -2040,6 +2077,79 @@ def ExtKF(infl=1.0,**kwargs):
 
 
 
+@DA_Config
+def ExtKF_Sqrt(infl=1.0,rank=None,bundle=False,**kwargs):
+  """
+  Square-root (and optionally reduced-rank) extended Kalman filter.
+
+  Same as ExtKF(), except that P is kept as a 'Left' factor, L (P = L@L.T),
+  which is propagated by Jacobian-vector products (F@L and H@L),
+  and updated by a symmetric square root in the (rank) subspace of L.
+  Thus, m-by-m matrices are never formed, and P stays symmetric (psd).
+
+  - rank  : truncate L to this rank (by tsvd) after adding model noise
+            (and at init). Default (None): no truncation,
+            except when the width of L exceeds m.
+  - bundle: compute F@L and H@L by finite differences
+            of f and h (as in iEnKS) instead of using f.jacob and h.jacob.
+            This is required for models without 'jacob' (e.g. QG).
+
+  Cost per step: O(m*r^2) plus r model runs (if bundle), with r = rank.
+  """
+  def assimilator(stats,twin,xx,yy):
+    f,h,chrono,X0 = twin.f, twin.h, twin.t, twin.X0
+    Rm12 = h.noise.C.sym_sqrt_inv
+
+    def truncate(L,r):
+      if r is not None:
+        U,s,_ = tsvd(L,min(r,*L.shape))
+        L     = U*s
+      elif L.shape[1] > f.m:
+        # L@L.T = R.T@R, with R from the (cheaper than svd) QR of L.T
+        L     = nla.qr(L.T,mode='r').T
+      return L
+
+    # Apply Jacobian (of operator 'op' at x) to the columns of L.
+    eps = 1e-4
+    def jac_prod(op,x,L,*args):
+      if bundle:
+        return (op(x + eps*L.T,*args) - op(x,*args)).T / eps
+      else:
+        return op.jacob(x,*args) @ L
+
+    mu = X0.mu * ones(f.m)
+    L  = truncate(X0.C.Left,rank)
+
+    stats.assess(0,mu=mu,Cov=CovMat(L,'Left'))
+
+    for k,kObs,t,dt in progbar(chrono.forecast_range):
+
+      L  = jac_prod(f,mu,L,t-dt,dt) * sqrt(infl**(dt))
+      mu = f(mu,t-dt,dt)
+      if f.noise.C is not 0:
+        L  = np.hstack([L, sqrt(dt)*f.noise.C.Left])
+        L  = truncate(L,rank)
+
+      if kObs is not None:
+        stats.assess(k,kObs,'f',mu=mu,Cov=CovMat(L,'Left'))
+        r      = L.shape[1]
+        # Sqrt update in the subspace of L (cf. EnKF 'Sqrt svd').
+        Y      = jac_prod(h,mu,L,t).T @ Rm12.T
+        dy     = (yy[kObs] - h(mu,t)) @ Rm12.T
+        V,s,_  = svd0(Y)
+        d      = pad0(s**2,r) + 1
+        Pw     = (V * d**(-1.0)) @ V.T
+        T      = (V * d**(-0.5)) @ V.T
+        mu     = mu + L @ (Pw @ (Y @ dy))
+        L      = L @ T
+
+        stats.trHK[kObs] = np.sum(s**2/(s**2+1))/h.noise.m
+
+      stats.assess(k,kObs,mu=mu,Cov=CovMat(L,'Left'))
+  return assimilator
+
+
+
 @DA_Config
 def RHF(N,ordr='rand',infl=1.0,rot=False,**kwargs):
   """
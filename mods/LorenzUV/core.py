@@ -23,7 +23,6 @@
 import numpy as np
 from numpy import arange
 from tools.math import rk4, is1d
-from matplotlib import pyplot as plt
 
 
 # Shift elements
@@ -125,6 +124,7 @@ class model_instance():
     return F
 
   def plot_state(self,x):
+    from matplotlib import pyplot as plt
     nU, J = self.nU, self.J
     circX = np.mod(arange(nU+1)  ,nU)
     circY = np.mod(arange(nU*J+1),nU*J) + nU
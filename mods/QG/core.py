@@ -57,16 +57,32 @@ prms_dict = {entry[0]: entry[1] for entry in prms}
 #########################
 # Write parameters to file
 #########################
-prm_filename = './mods/QG/f90/prms_tmp.txt'
-# Create string
-prm_txt = """! Parameter file auto generated from python
+# Written on first use (rather than at import), once per process,
+# to a temporary location, so that concurrent runs do not clobber
+# each other's file. Forked workers inherit the file of their parent.
+# It is removed at exit (of the process that wrote it).
+import atexit
+_prm_file = None
+def _remove_prm_file(fname,pid):
+  if os.getpid()==pid and os.path.isfile(fname):
+    os.remove(fname)
+
+def prm_filename():
+  global _prm_file
+  if _prm_file is None:
+    # Create string
+    prm_txt = """! Parameter file auto generated from python
 &parameters"""
-for p in prms:
-  prm_txt += "\n  " + p[0].ljust(20) + '= ' + str(p[1])
-prm_txt += """\n/\n"""
-# Write string to file
-with open(prm_filename, 'w') as f:
-  f.write(prm_txt)
+    for p in prms:
+      prm_txt += "\n  " + p[0].ljust(20) + '= ' + str(p[1])
+    prm_txt += """\n/\n"""
+    # Write string to file
+    fd, fname = tempfile.mkstemp(prefix='QG_prms_',suffix='.txt')
+    with os.fdopen(fd, 'w') as f:
+      f.write(prm_txt)
+    atexit.register(_remove_prm_file, fname, os.getpid())
+    _prm_file = fname
+  return _prm_file
 
 
 #########################
@@ -104,7 +120,7 @@ def step_1(x0, t, dt_):
   assert isinstance(t,float)
   psi = square(x0)
   t   = np.array([t]) # QG is time-indep -- does not matter
-  fortran.step(t,psi,prm_filename)
+  fortran.step(t,psi,prm_filename())
   x   = flatten(psi)
   return x
 
@@ -115,6 +131,7 @@ def step(E, t, dt_):
   if E.ndim==1:
     return step_1(E,t,dt_)
   if E.ndim==2:
+    prm_filename() # Write it here, rather than in each worker.
     # Parallelized:
     E = np.array(multiproc_map(step_1, E, t=t, dt_=dt_))
     # Non-parallelized:
@@ -125,22 +142,43 @@ def step(E, t, dt_):
 #########################
 # Free run
 #########################
-def gen_sample(Len,SpinUp,Spacing):
-  sample = zeros((Len,m))
-  x = zeros(m)
+def gen_sample(Len,SpinUp,Spacing,nChains=1):
+  """
+  Sample from a free run.
+  With nChains>1, the sample is gathered from several chains,
+  which are simulated simultaneously as an ensemble (i.e. in parallel, see step()).
+  NB: the chains start from nearly identical states (small perturbations of 0),
+  and only become independent through the (chaotic) SpinUp, which each chain runs
+  before being sampled. The SpinUp must therefore be long compared to the
+  doubling time (25-50): e.g. 500 steps (of dt=5) amply lets the
+  perturbations (1e-3) saturate. With a short SpinUp, the chains are correlated
+  (and the sample is less diverse than its size suggests).
+  """
+  nPer   = int(ceil(Len/nChains))
+  sample = zeros((nPer,nChains,m))
+  E      = zeros((nChains,m))
+  E[1:]  = 1e-3*np.random.RandomState(nChains).randn(nChains-1,m)
   n = 0
-  for k in progbar(range(Len*Spacing + SpinUp),desc='Simulating'):
-    x = step(x,0.0,dt)
+  for k in progbar(range(nPer*Spacing + SpinUp),desc='Simulating'):
+    E = step(E if nChains>1 else E[0],0.0,dt).reshape((nChains,m))
     if k>=SpinUp and k%Spacing==0:
-      sample[n] = x
+      sample[n] = E
       n += 1
-  return sample
+  return sample.reshape((-1,m))[:Len]
 
 sample_filename = 'data/samples/QG_samples.npz'
-if not os.path.isfile(sample_filename):
-  print('Generating a "random" sample with which to start simulations')
-  sample = gen_sample(400,500,10)
-  np.savez(sample_filename,sample=sample)
+def sample_file():
+  """
+  Return sample_filename, generating the sample on first use
+  (rather than at import). Use as RV(m=m,file=sample_file).
+  """
+  if not os.path.isfile(sample_filename):
+    print('Generating a "random" sample with which to start simulations')
+    nChains = max(1,multiprocessing.cpu_count()-1)
+    sample  = gen_sample(400,500,10,nChains)
+    os.makedirs(os.path.dirname(sample_filename),exist_ok=True)
+    np.savez(sample_filename,sample=sample)
+  return sample_filename
 
 
 #########################
@@ -158,9 +196,9 @@ if not os.path.isfile(sample_filename):
 
 # Although psi is the state variable, q looks cooler.
 # q = Del2(psi) - F*psi.
-import scipy.ndimage.filters as filters
 dx = 1/(nx-1)
 def compute_q(psi):
+  import scipy.ndimage.filters as filters
   Lapl = filters.laplace(psi,mode='constant')/dx**2
   return Lapl - prms_dict['F']*psi
 
@@ -2,7 +2,7 @@
 
 from common import *
 
-from mods.QG.core import step, dt, nx, ny, m, square, sample_filename, show
+from mods.QG.core import step, dt, nx, ny, m, square, sample_file, show
 
 
 # As specified in core.py: dt = 4*1.25 = 5.0.
@@ -14,6 +14,7 @@ t = Chronology(dt=dt,dkObs=1,T=600,BurnIn=20)
 # Considering that I have 8GB on the Mac, and the estimate:
 # ≈ (8 bytes/float)*(129² float/stat)*(7 stat/k) * K,
 # it should be possible to have an experiment with maximum K≈8000.
+# Larger K is possible by storing the stats on disk (see Stats.store_dir).
 
 
 f = {
@@ -22,7 +23,7 @@ f = {
     'noise': 0,
     }
 
-X0 = RV(m=m,file=sample_filename)
+X0 = RV(m=m,file=sample_file)
 
 
 ############################
@@ -1,21 +1,104 @@
 from common import *
 
+import weakref, shutil
+
 class Stats(MLR_Print):
   """
   Contains and computes statistics of the DA methods.
+
+  The statistics ("probes") are listed in Stats.probes.
+  Only those requested by the config (cfg.stats) are allocated and computed.
   """
 
   # Adjust this to omit heavy computations
   comp_threshold_3 = 51
+  # Above comp_threshold_3, compute (by randomized svd) only this many
+  # leading ensemble svals/umisf. Pays off if min(N,m) >~ 100. 0: skip them.
+  comp_rank_svd    = 0
+
+  # If not None: store the multivariate FAU_series on disk (memory-mapped),
+  # in a new sub-dir (see self._store_dir) of this dir. E.g. 'data/stats'.
+  # The sub-dir is deleted along with the Stats object (or at exit),
+  # so copy (np.array) the series that should outlive it.
+  store_dir   = None
+  # If not None: dtype of the (float) series stored on disk, e.g. np.float32.
+  store_dtype = None
+
+  # If > 0: assess in a background thread (overlapping with the next forecast),
+  # with at most this many assessments pending (each holding a copy of E).
+  # The results are identical to the (default) synchronous assessment
+  # (but errors not caught by validate_ens/_ext are raised with a delay).
+  # Not applied with liveplotting. NB: Beware of forking (multiproc_map)
+  # while the thread is running (it's fine unless BLAS is multithreaded).
+  async_assess = 0
+
+  # Registry of statistics. See register_probe().
+  probes = OrderedDict()
 
   # Used by MLR_Print
   excluded  = MLR_Print.excluded + ['setup','config','xx','yy']
   precision = 3
   ordr_by_linenum = -1
+
+  @classmethod
+  def register_probe(cls,name,kind='fau',length=1,cost=1,deps=(),
+      ens=False,dtype=float,fun=None):
+    """
+    Register a statistic ("probe").
+     - kind  : 'fau' (FAU_series) or 'obs' (array of length KObs+1).
+               NB: 'obs' probes are set by the assimilators (e.g. trHK),
+               or by fun (at the analysis times, stored at [kObs]),
+               and are always allocated (they're cheap).
+     - length: of each time instance: 1, 'm', 'N', or 'mN' (i.e. min(m,N)).
+     - cost  : 1 for O(m*N), 3 for O(m*N*min(m,N)). Only cost <= 1
+               are computed by default when sqrt(m*N) > comp_threshold_3
+               (the others are then allocated, but left as nan).
+     - deps  : other probes that must also be included.
+     - ens   : only applies to ensemble methods.
+     - fun   : for custom (non-builtin) probes: fun(stats,k,E,w,mu,P),
+               whose output is stored at stats.<name>[k]. It is called
+               after the builtin probes (of which it may use the values).
+    """
+    cls.probes[name] = Bunch(kind=kind, length=length, cost=cost,
+        deps=deps, ens=ens, dtype=dtype, fun=fun)
+
+  def select_probes(self,config,m,N,skip_costly=True):
+    """
+    Determine the set of probes to compute.
+    config.stats: None (default selection), or a list of probe names.
+    The names may have a suffix ('rmse_a', 'logp_m_f'), which is ignored.
+    LivePlotting requires the default selection.
+    config.summary: only keep the univariate (scalar) probes, which are
+    then averaged on the fly (see FAU_series), rather than stored.
+    skip_costly: exclude the costly probes from the default selection
+    (see register_probe). Use False to get the probes to allocate.
+    """
+    size    = m if N is None else sqrt(m*N)
+    is_cheap = size <= Stats.comp_threshold_3 or not skip_costly
+    request = getattr(config,'stats',None)
+    if request is None or config.liveplotting:
+      request = [name for name,P in Stats.probes.items() if
+          P.cost<=1 or is_cheap or (N and Stats.comp_rank_svd)]
+    selected = set()
+    def add(name):
+      if name not in Stats.probes:
+        base = re.sub('_[fau]+$','',name)
+        if base==name: raise KeyError("Unknown stats probe: "+name)
+        name = base
+      if name in selected: return
+      if Stats.probes[name].ens and N is None: return
+      selected.add(name)
+      for dep in Stats.probes[name].deps: add(dep)
+    for name in request: add(name)
+    if getattr(config,'summary',False):
+      if config.liveplotting:
+        raise ValueError("LivePlotting is not possible in summary mode.")
+      selected = {name for name in selected if Stats.probes[name].length==1}
+    return selected
  
   def __init__(self,config,setup,xx,yy):
     """
-    Init the default statistics.
+    Init the (selected) statistics.
     Note: you may well allocate & compute individual stats elsewhere,
           and simply assigne them as an attribute to the stats instance.
     """
@@ -25,43 +108,59 @@ class Stats(MLR_Print):
     self.xx     = xx
     self.yy     = yy
 
+    self._ptimer = PhaseTimer()
+    # Precision of the ensemble (and of the multivariate series).
+    # Can also be set for the setup (as setup.dtype).
+    self._dtype  = getattr(config,'dtype',None) or getattr(setup,'dtype',None)
+    self._worker = None # see async_assess
+    self._checkpoint = None # (Checkpoint, path)
+    self._resumed_at = None # k of the checkpoint resumed from
+
     m    = setup.f.m    ; assert m   ==xx.shape[1]
     K    = setup.t.K    ; assert K   ==xx.shape[0]-1
     p    = setup.h.m    ; assert p   ==yy.shape[1]
     KObs = setup.t.KObs ; assert KObs==yy.shape[0]-1
 
-    # time-series constructor alias
-    fs = self.new_FAU_series 
-    self.mu     = fs(m) # Mean
-    self.var    = fs(m) # Variances
-    self.mad    = fs(m) # Mean abs deviations
-    self.err    = fs(m) # Error (mu-truth)
-    self.logp_m = fs(1) # Marginal, Gaussian Log score
-    self.skew   = fs(1) # Skewness
-    self.kurt   = fs(1) # Kurtosis
-    self.rmv    = fs(1) # Root-mean variance
-    self.rmse   = fs(1) # Root-mean square error
-
     if hasattr(config,'N'):
       # Ensemble-only init
       self._had_0v = False
       self._is_ens = True
       N            = config.N
       m_Nm         = min(m,N)
-      self.w       = fs(N)           # Importance weights
-      self.rh      = fs(m,dtype=int) # Rank histogram
-      #self.N      = N               # Use w.shape[1] instead
+      # Separate random state (for rsvd) to not affect that of the DA.
+      self._svd_rng = np.random.RandomState(3000)
     else:
       # Linear-Gaussian assessment
       self._is_ens = False
+      N            = None
       m_Nm         = m
 
-    self.svals = fs(m_Nm) # Principal component (SVD) scores
-    self.umisf = fs(m_Nm) # Error in component directions
-
-    # Other. 
-    self.trHK = np.full(KObs+1, nan)
-    self.infl = np.full(KObs+1, nan)
+    self._on = self.select_probes(config,m,N)
+    # The default probes skipped for their cost are nevertheless allocated
+    # (i.e. left as nan series), as expected by the plotting (e.g. LivePlot).
+    allocate = self.select_probes(config,m,N,skip_costly=False)
+
+    if Stats.store_dir is not None:
+      os.makedirs(Stats.store_dir, exist_ok=True)
+      self._store_dir = tempfile.mkdtemp(dir=Stats.store_dir,
+          prefix=config.da_method.__name__+'_')
+      weakref.finalize(self, shutil.rmtree, self._store_dir, ignore_errors=True)
+
+    # Allocate
+    lengths = {1:1, 'm':m, 'N':N, 'mN':m_Nm}
+    for name, P in Stats.probes.items():
+      if P.kind == 'obs':
+        setattr(self, name, np.full(KObs+1, nan))
+      elif name in allocate:
+        length = lengths[P.length]
+        kwargs = {'dtype':P.dtype}
+        if length>1 and P.dtype is float and self._dtype is not None:
+          kwargs['dtype'] = self._dtype
+        if length>1 and Stats.store_dir is not None:
+          kwargs['store_dir'] = os.path.join(self._store_dir, name)
+          if P.dtype is float and Stats.store_dtype is not None:
+            kwargs['dtype'] = Stats.store_dtype
+        setattr(self, name, self.new_FAU_series(length,**kwargs))
 
 
   def assess(self,k,kObs=None,f_a_u=None,
@@ -73,7 +172,17 @@ class Stats(MLR_Print):
            the forecast/analysis/universal attribute.
            Defaults: see source code.
     If 'u' in f_a_u: call/update LivePlot.
+    If checkpointing: save the checkpoint (if due) after the analysis.
     """
+    if self._resumed_at is not None and k <= self._resumed_at:
+      return # Already assessed (before the checkpoint)
+    t0 = time.perf_counter()
+    try:
+      self._assess(k,kObs,f_a_u,E=E,w=w,mu=mu,Cov=Cov)
+    finally:
+      self._ptimer.add('assess', time.perf_counter()-t0)
+
+  def _assess(self,k,kObs,f_a_u,E,w,mu,Cov):
 
     # Initial consistency checks.
     if k==0:
@@ -108,47 +217,68 @@ class Stats(MLR_Print):
     if not (LP or store_u) and kObs==None:
       pass # Skip assessment
     else:
-      # Prepare assessment call and arguments
-      if self._is_ens:
-        # Ensemble assessment
-        alias = self.assess_ens
-        state_prms = {'E':E,'w':w}
+      if LP or not Stats.async_assess:
+        self._assess_state(key,E,w,mu,Cov)
       else:
-        # Linear-Gaussian assessment
-        alias = self.assess_ext
-        state_prms = {'mu':mu,'P':Cov}
-
-      # Call assessment
-      with np.errstate(divide='ignore',invalid='ignore'):
-        alias(key,**state_prms)
-
-      # In case of degeneracy, variance might be 0,
-      # causing warnings in computing skew/kurt/MGLS
-      # (which all normalize by variance).
-      # This should and will yield nan's, but we don't want
-      # the diagnostics computations to cause too many warnings,
-      # so we turned them off above. But we'll manually warn ONCE here.
-      if not getattr(self,'_had_0v',False) \
-          and np.allclose(sqrt(self.var[key]),0):
-        self._had_0v = True
-        warnings.warn("Sample variance was 0 at (k,kObs,fau) = " + str(key))
-
+        # Validate now (to raise failures at the same k as the sync. mode),
+        # and assess a snapshot (E may get modified in-place) in the background.
+        if self._is_ens: self.validate_ens(key,E,w)
+        else:            self.validate_ext(key,mu)
+        snap = lambda a: a.copy() if isinstance(a,np.ndarray) else a
+        if self._worker is None:
+          self._worker = BackgroundWorker(Stats.async_assess)
+        self._worker.submit(self._assess_state,key,snap(E),snap(w),snap(mu),snap(Cov))
 
       # LivePlot
       if LP:
+        state_prms = {'E':E,'w':w} if self._is_ens else {'mu':mu,'P':Cov}
         if k==0:
           self.lplot = LivePlot(self,**state_prms,only=LP)
         elif 'u' in f_a_u:
           self.lplot.update(k,kObs,**state_prms)
 
+    if self._checkpoint is not None and kObs is not None and 'u' in f_a_u:
+      ckpt, path = self._checkpoint
+      ckpt.save(self,path,k,kObs,E=E,w=w,mu=mu,Cov=Cov)
 
-  def assess_ens(self,k,E,w=None):
-    """Ensemble and Particle filter (weighted/importance) assessment."""
-    # Unpack
-    N,m = E.shape
-    x = self.xx[k[0]]
 
-    # Process weights
+  def _assess_state(self,key,E,w,mu,Cov):
+    "Call assess_ens/_ext, and the custom probes."
+    with np.errstate(divide='ignore',invalid='ignore'):
+      if self._is_ens:
+        # Ensemble assessment
+        self.assess_ens(key,E,w)
+      else:
+        # Linear-Gaussian assessment
+        self.assess_ext(key,mu,Cov)
+
+      # Custom probes
+      k, kObs, f_a_u = key
+      for name in self._on:
+        P = Stats.probes[name]
+        if P.fun is None:
+          continue
+        if P.kind == 'obs':
+          # Computed at the analysis times only
+          if kObs is not None and 'a' in f_a_u:
+            getattr(self,name)[kObs] = P.fun(self,key,E=E,w=w,mu=mu,P=Cov)
+        else:
+          getattr(self,name).write(key, P.fun(self,key,E=E,w=w,mu=mu,P=Cov))
+
+  def join_assessments(self,reraise=True):
+    "Wait for the background assessments (see async_assess) to finish."
+    if self._worker is not None:
+      worker, self._worker = self._worker, None
+      t0 = time.perf_counter()
+      try:
+        worker.join(reraise)
+      finally:
+        self._ptimer.add('assess', time.perf_counter()-t0)
+
+
+  def validate_ens(self,k,E,w=None):
+    "Process weights (w), and check ensemble. Returns w (as an array)."
+    N = len(E)
     if w is None: 
       self._has_w = False
       w           = 1/N
@@ -161,10 +291,19 @@ class Stats(MLR_Print):
     if abs(w.sum()-1) > 1e-5:      raise_AFE("Weights did not sum to one.",k)
     if not np.all(np.isfinite(E)): raise_AFE("Ensemble not finite.",k)
     if not np.all(np.isreal(E)):   raise_AFE("Ensemble not Real.",k)
+    return w
+
+  def assess_ens(self,k,E,w=None):
+    """Ensemble and Particle filter (weighted/importance) assessment."""
+    # Unpack
+    N,m = E.shape
+    x   = self.xx[k[0]]
+    on  = self._on
+    w   = self.validate_ens(k,E,w)
 
-    self.w[k]    = w
-    self.mu[k]   = w @ E
-    A            = E - self.mu[k]
+    if 'w' in on: self.w.write(k, w)
+    mu           = w @ E
+    A            = E - mu
 
     # While A**2 is approx as fast as A*A,
     # A**3 is 10x slower than A**2 (or A**2.0).
@@ -172,97 +311,152 @@ class Stats(MLR_Print):
     # But, to save memory, only use A_pow.
     A_pow        = A**2
 
-    self.var[k]  = w @ A_pow
-    self.mad[k]  = w @ abs(A)  # Mean abs deviations
+    var          = w @ A_pow
+    if 'mad' in on:
+      self.mad.write(k, w @ abs(A))  # Mean abs deviations
 
     ub           = unbias_var(w,avoid_pathological=True)
-    self.var[k] *= ub
+    var         *= ub
     
 
     # For simplicity, use naive (biased) formulae, derived
     # from "empirical measure". See doc/unbiased_skew_kurt.jpg.
     # Normalize by var. Compute "excess" kurt, which is 0 for Gaussians.
-    A_pow       *= A
-    self.skew[k] = mean( w @ A_pow / self.var[k]**(3/2) )
-    A_pow       *= A # idem.
-    self.kurt[k] = mean( w @ A_pow / self.var[k]**2 - 3 )
-
-    self.derivative_stats(k,x)
-
-    if sqrt(m*N) <= Stats.comp_threshold_3:
-      if N<=m:
-        _,s,UT         = svd( (sqrt(w)*A.T).T, full_matrices=False)
-        s             *= sqrt(ub) # Makes s^2 unbiased
-        self.svals[k]  = s
-        self.umisf[k]  = UT @ self.err[k]
+    if 'skew' in on or 'kurt' in on:
+      A_pow       *= A
+      if 'skew' in on:
+        self.skew.write(k, mean( w @ A_pow / var**(3/2) ))
+      A_pow       *= A # idem.
+      if 'kurt' in on:
+        self.kurt.write(k, mean( w @ A_pow / var**2 - 3 ))
+
+    err = self.derivative_stats(k,x,mu,var)
+
+    if 'rh' in on:
+      # Rank of truth (x) among the ensemble (E), for each state dim [i].
+      # Equals the index of x in the sorted np.vstack((E,x))[:,i].
+      self.rh.write(k, np.sum(E < x, 0))
+
+    if 'svals' in on:
+      # Principal components (of the weighted anomalies).
+      # Use a single thin svd, regardless of whether N<=m.
+      # Its right singular vectors are the eigenvectors of the ens. cov.
+      Aw = (sqrt(w)*A.T).T
+      if sqrt(m*N) > Stats.comp_threshold_3 and Stats.comp_rank_svd:
+        r      = min(Stats.comp_rank_svd, N, m)
+        _,s,UT = rsvd(Aw, r, rng=self._svd_rng)
       else:
-        P              = (A.T * w) @ A
-        s2,U           = eigh(P)
-        s2            *= ub
-        self.svals[k]  = sqrt(s2.clip(0))[::-1]
-        self.umisf[k]  = U.T[::-1] @ self.err[k]
-
-      # For each state dim [i], compute rank of truth (x) among the ensemble (E)
-      Ex_sorted     = np.sort(np.vstack((E,x)),axis=0,kind='heapsort')
-      self.rh[k]    = [np.where(Ex_sorted[:,i] == x[i])[0][0] for i in range(m)]
+        _,s,UT = svd(Aw, full_matrices=False)
+      nan_pad = lambda x: np.append(x, [nan]*(min(N,m)-len(x)))
+      self.svals.write(k, nan_pad(s * sqrt(ub))) # Makes s^2 unbiased
+      if 'umisf' in on:
+        self.umisf.write(k, nan_pad(UT @ err))
 
 
-  def assess_ext(self,k,mu,P):
-    """Kalman filter (Gaussian) assessment."""
-
+  def validate_ext(self,k,mu):
+    "Check estimates."
     isFinite = np.all(np.isfinite(mu)) # Do not check covariance
     isReal   = np.all(np.isreal(mu))   # (coz might not be explicitly availble)
     if not isFinite: raise_AFE("Estimates not finite.",k)
     if not isReal:   raise_AFE("Estimates not Real.",k)
 
-    m = len(mu)
-    x = self.xx[k[0]]
+  def assess_ext(self,k,mu,P):
+    """Kalman filter (Gaussian) assessment."""
+    self.validate_ext(k,mu)
+
+    m  = len(mu)
+    x  = self.xx[k[0]]
+    on = self._on
 
-    self.mu[k]  = mu
-    self.var[k] = P.diag if isinstance(P,CovMat) else diag(P)
-    self.mad[k] = sqrt(self.var[k])*sqrt(2/pi)
-    # ... because sqrt(2/pi) = ratio MAD/STD for Gaussians
+    var = P.diag if isinstance(P,CovMat) else diag(P)
+    if 'mad' in on:
+      self.mad.write(k, sqrt(var)*sqrt(2/pi))
+      # ... because sqrt(2/pi) = ratio MAD/STD for Gaussians
 
-    self.derivative_stats(k,x)
+    err = self.derivative_stats(k,x,mu,var)
 
-    if m <= Stats.comp_threshold_3:
+    if 'svals' in on:
       P             = P.full if isinstance(P,CovMat) else P
       s2,U          = nla.eigh(P)
-      self.svals[k] = sqrt(np.maximum(s2,0.0))[::-1]
-      self.umisf[k] = (U.T @ self.err[k])[::-1]
+      self.svals.write(k, sqrt(np.maximum(s2,0.0))[::-1])
+      if 'umisf' in on:
+        self.umisf.write(k, (U.T @ err)[::-1])
 
 
-  def derivative_stats(self,k,x):
-    """Stats that apply for both _w and _ext paradigms and derive from the other stats."""
-    self.err[k]  = self.mu[k] - x
-    self.rmv[k]  = sqrt(mean(self.var[k]))
-    self.rmse[k] = sqrt(mean(self.err[k]**2))
-    self.MGLS(k)
+  def derivative_stats(self,k,x,mu,var):
+    """
+    Stats that apply for both _w and _ext paradigms and derive from the other stats.
+    Returns err (for use by further stats).
+    """
+    on  = self._on
+    err = mu - x
+    if 'mu'     in on: self.mu    .write(k, mu)
+    if 'var'    in on: self.var   .write(k, var)
+    if 'err'    in on: self.err   .write(k, err)
+    if 'rmv'    in on: self.rmv   .write(k, sqrt(mean(var)))
+    if 'rmse'   in on: self.rmse  .write(k, sqrt(mean(err**2)))
+    if 'logp_m' in on: self.logp_m.write(k, self.MGLS(err,var))
+
+    # In case of degeneracy, variance might be 0,
+    # causing warnings in computing skew/kurt/MGLS
+    # (which all normalize by variance).
+    # This should and will yield nan's, but we don't want
+    # the diagnostics computations to cause too many warnings,
+    # so we turned them off (in assess). But we'll manually warn ONCE here.
+    if not getattr(self,'_had_0v',False) \
+        and np.allclose(sqrt(var),0):
+      self._had_0v = True
+      warnings.warn("Sample variance was 0 at (k,kObs,fau) = " + str(k))
+
+    return err
     
-  def MGLS(self,k):
+  def MGLS(self,err,var):
     # Marginal Gaussian Log Score.
-    m              = len(self.err[k])
-    ldet           = log(self.var[k]).sum()
-    nmisf          = self.var[k]**(-1/2) * self.err[k]
+    m              = len(err)
+    ldet           = log(var).sum()
+    nmisf          = var**(-1/2) * err
     logp_m         = (nmisf**2).sum() + ldet
-    self.logp_m[k] = logp_m/m
+    return logp_m/m
+
 
+  # Phases of the assimilation, as timed by assim_caller().
+  # 'analysis' is the remainder of the total (i.e. not spent in other phases).
+  timed_phases = ['forecast','noise','localization','analysis',
+      'post_process','assess','total']
 
-  def average_in_time(self):
+  @property
+  def timings(self):
+    """Wall-clock time (seconds) spent in each phase of the assimilation."""
+    tt = self._ptimer.totals
+    timings = OrderedDict((phase, tt.get(phase,0.0)) for phase in self.timed_phases)
+    timings['analysis'] = max(0, timings['total'] - sum(
+      t for phase, t in tt.items() if phase!='total'))
+    return timings
+
+  def average_in_time(self,as_records=False):
     """
     Avarage all univariate (scalar) time series.
+    Also include the timings (as 'time_<phase>'), whose conf is nan.
+    as_records: return a record (see avrgs_to_records) instead of a dict.
     """
-    avrg = AlignedDict()
+    avrg    = AlignedDict()
+    pending = [] # (key, series) to be averaged in batches
     for key,series in vars(self).items():
       if key.startswith('_'):
         continue
       try:
         # FAU_series
         if isinstance(series,FAU_series):
-          # Compute
-          f_a_u = series.average()
-          # Add the sub-fields as sub-scripted fields
-          for sub in f_a_u: avrg[key+'_'+sub] = f_a_u[sub]
+          if series.summary:
+            f_a_u = series.average()
+            # Add the sub-fields as sub-scripted fields
+            for sub in f_a_u: avrg[key+'_'+sub] = f_a_u[sub]
+          else:
+            if series.m > 1:
+              raise NotImplementedError
+            for sub, ss in series.series_BI().items():
+              avrg[key+'_'+sub] = None # Placeholder (keeps the ordering)
+              pending.append((key+'_'+sub, ss))
         # Array
         elif isinstance(series,np.ndarray):
           if series.ndim > 1:
@@ -274,8 +468,8 @@ class Stats(MLR_Print):
             inds = t.kk_BI
           else:
             raise ValueError
-          # Compute
-          avrg[key] = series_mean_with_conf(series[inds])
+          avrg[key] = None
+          pending.append((key, series[inds]))
         # Scalars
         elif np.isscalar(series):
           avrg[key] = series
@@ -283,6 +477,18 @@ class Stats(MLR_Print):
           raise NotImplementedError
       except NotImplementedError:
         pass
+
+    # Compute. Batch the series of equal length.
+    for n in {len(ss) for _, ss in pending}:
+      batch = [(key,ss) for key,ss in pending if len(ss)==n]
+      vcs   = series_mean_with_conf(array([ss for _,ss in batch],dtype=float))
+      for (key,_), vc in zip(batch,vcs):
+        avrg[key] = vc
+
+    for phase, t in self.timings.items():
+      avrg['time_'+phase] = val_with_conf(t, nan)
+    if as_records:
+      return avrgs_to_records(avrg)
     return avrg
 
 
@@ -298,8 +504,10 @@ class Stats(MLR_Print):
       avrg['rmse_'+fa] = sqrt(mean(getattr(self.err,fa)[:,ii]**2,1))
       avrg['rmv_' +fa] = sqrt(mean(getattr(self.var,fa)[:,ii]   ,1))
     # Average in time:
-    for key,series in avrg.items():
-      avrg[key] = series_mean_with_conf(series[self.setup.t.maskObs_BI])
+    keys = list(avrg.keys())
+    vcs  = series_mean_with_conf(array([avrg[key][self.setup.t.maskObs_BI] for key in keys]))
+    for key, vc in zip(keys, vcs):
+      avrg[key] = vc
     return avrg
 
 
@@ -307,7 +515,8 @@ class Stats(MLR_Print):
   def new_FAU_series(self,m,**kwargs):
     "Convenience FAU_series constructor."
     store_u = self.config.store_u
-    return FAU_series(self.setup.t, m, store_u=store_u, **kwargs)
+    summary = getattr(self.config,'summary',False) and m==1
+    return FAU_series(self.setup.t, m, store_u=store_u, summary=summary, **kwargs)
 
   # TODO: Provide frontend initializer 
 
@@ -328,23 +537,92 @@ class Stats(MLR_Print):
   #   return np.full((K+1,)+m,**kwargs)
 
 
+# Builtin probes
+# NB: Ordering matters for the allocation, and thus for print_averages.
+register_probe = Stats.register_probe
+register_probe('mu'    , length='m')                     # Mean
+register_probe('var'   , length='m')                     # Variances
+register_probe('mad'   , length='m')                     # Mean abs deviations
+register_probe('err'   , length='m')                     # Error (mu-truth)
+register_probe('logp_m')                                 # Marginal, Gaussian Log score
+register_probe('skew')                                   # Skewness
+register_probe('kurt')                                   # Kurtosis
+register_probe('rmv'   )                                 # Root-mean variance
+register_probe('rmse'  )                                 # Root-mean square error
+register_probe('w'     , length='N', ens=True)           # Importance weights
+register_probe('rh'    , length='m', ens=True,dtype=int) # Rank histogram
+register_probe('svals' , length='mN', cost=3)            # Principal component (SVD) scores
+register_probe('umisf' , length='mN', cost=3,            # Error in component directions
+    deps=['svals'])
+register_probe('trHK'  , kind='obs')
+register_probe('infl'  , kind='obs')
+
+
+
+# Averages (dicts of val_with_conf) can also be represented as structured
+# arrays ("records"), with a (val,conf) pair of floats for each field.
+# Arrays of records can then be aggregated (along any axis) at once,
+# for all fields, instead of looping over entries and keys.
+
+def avrgs_dtype(keys):
+  "The dtype of records with the given fields."
+  return np.dtype([(key, [('val',float),('conf',float)]) for key in keys])
+
+def avrgs_to_records(avrgs):
+  """
+  Convert avrgs (a dict, or an array of dicts) to (an array of) records.
+  Fields missing from some entries are NaN. Scalar (non val_with_conf) entries get conf=NaN.
+  """
+  if isinstance(avrgs,dict):
+    return avrgs_to_records(array([avrgs]))[0]
+  avrgs = np.asarray(avrgs)
+  keys  = OrderedDict()
+  for a in avrgs.flat:
+    keys.update((key,None) for key in a)
+  R = np.empty(avrgs.shape, avrgs_dtype(keys))
+  for ii,a in np.ndenumerate(avrgs):
+    R[ii] = tuple((v.val,v.conf) if isinstance(v,val_with_conf) else (v,nan)
+        if v is not None else (nan,nan) for v in (a.get(key) for key in keys))
+  return R
+
+def records_to_avrgs(R):
+  "Inverse of avrgs_to_records."
+  if R.ndim == 0:
+    return AlignedDict((key, val_with_conf(*R[key].tolist())) for key in R.dtype.names)
+  avrgs = np.empty(R.shape, dict)
+  for ii in np.ndindex(R.shape):
+    avrgs[ii] = records_to_avrgs(R[ii])
+  return avrgs
+
+def average_records(R,axis=None):
+  """
+  Average (an array of) records along axis (int, tuple, or None: all).
+  The confidences are pooled as for the mean of independent estimates:
+  conf = sqrt(sum(conf**2))/N.
+  """
+  keys = R.dtype.names
+  X    = np.ascontiguousarray(R, avrgs_dtype(keys)).view(float).reshape(R.shape+(len(keys),2))
+  if axis is None:
+    axis = tuple(range(R.ndim))
+  axis = tuple(ax%R.ndim for ax in np.atleast_1d(axis))
+  N    = prod([R.shape[ax] for ax in axis])
+  val  = X[...,0].mean(axis)
+  conf = sqrt((X[...,1]**2).sum(axis)) / N
+  out  = np.empty(val[...,0].size, avrgs_dtype(keys))
+  out.view(float)[:] = np.stack([val,conf],-1).ravel()
+  return out.reshape(val.shape[:-1])
 
 def average_each_field(ss,axis=None):
-  "Average a 2D table (where T[i,j] is a dict of fields) along a given axis."
-  assert ss.ndim == 2
-  if axis == 0:
-    ss = np.transpose(ss)
-  m,N = ss.shape
-  avrg = np.empty(m,dict)
-  for i,row in enumerate(ss):
-    avrg[i] = dict()
-    for key in ss[i][0].keys():
-      avrg[i][key] = val_with_conf(
-          val  = mean([s_ij[key].val  for s_ij in row]),
-          conf = mean([s_ij[key].conf for s_ij in row])/sqrt(N))
-      # NB: This is a rudimentary averaging of confidence intervals
-      # Should be checked against variance of avrg[i][key].val
-  return avrg
+  """
+  Average a table (where T[i,j] is a dict of fields) along a given axis
+  (default: the last one). Also accepts records (see avrgs_to_records),
+  in which case records are returned.
+  """
+  if axis is None:
+    axis = -1
+  if isinstance(ss,(np.ndarray,np.void)) and ss.dtype.names:
+    return average_records(ss,axis)
+  return records_to_avrgs(average_records(avrgs_to_records(ss),axis))
 
 
 
@@ -1,4 +1,5 @@
 from common import *
+from copy import copy
 
 class TwinSetup(MLR_Print):
   """
@@ -48,6 +49,43 @@ class Operator(MLR_Print):
     return self.model(*args,**kwargs)
 
 
+def timed_setup(setup,ptimer):
+  """
+  Shallow copy of setup, whose forecast model, and localization functions,
+  are timed (as phases 'forecast' and 'localization') by ptimer.
+  """
+  setup   = copy(setup)
+  setup.f = copy(setup.f)
+  setup.f.model = ptimer.wrap('forecast', setup.f.model)
+  if hasattr(setup.h,'loc_f'):
+    loc_f   = setup.h.loc_f
+    setup.h = copy(setup.h)
+    def timed_loc_f(*args,**kwargs):
+      locf_at = ptimer.wrap('localization', loc_f)(*args,**kwargs)
+      return ptimer.wrap('localization', locf_at)
+    setup.h.loc_f = timed_loc_f
+  return setup
+
+def dtype_setup(setup,dtype):
+  """
+  Shallow copy of setup, whose initial ensemble and forecasts are of dtype
+  (e.g. 'float32'), and so, in effect, the storage of the ensemble.
+  The sensitive (ensemble-space) linear algebra of the analysis is still
+  done in float64, which happens automatically where the (float64)
+  obs. error covariance (R) enters, but the resulting transforms
+  should be cast to E.dtype before being applied to the anomalies.
+  """
+  setup    = copy(setup)
+  setup.f  = copy(setup.f)
+  setup.X0 = copy(setup.X0)
+  model, sample = setup.f.model, setup.X0.sample
+  def model_dtype(E,*args,**kwargs):
+    return np.asarray(model(E.astype(dtype,copy=False),*args,**kwargs), dtype)
+  setup.f.model   = model_dtype
+  setup.X0.sample = lambda N: sample(N).astype(dtype)
+  return setup
+
+
 
 def DA_Config(da_method):
   """
@@ -88,15 +126,39 @@ def DA_Config(da_method):
     ############################
     # Make assimilation caller
     #---------------------------
-    def assim_caller(setup,xx,yy):
-      name_hook = da_method.__name__ # for pdesc of progbar
+    def assim_caller(setup,xx,yy,sd=None,checkpoint=None,cache=None):
+      if sd is not None:
+        with rng_context(sd):
+          return assim_caller(setup,xx,yy,checkpoint=checkpoint,cache=cache)
 
       # Init stats
       stats = Stats(cfg,setup,xx,yy)
 
+      # Share the initial ensemble and forecasts with other configs
+      twin = setup if cache is None else cached_setup(setup,cache)
+
+      # Precision of the ensemble
+      twin = twin if stats._dtype is None else dtype_setup(twin,stats._dtype)
+
+      # Save checkpoints, and resume from the existing one (if any)
+      if checkpoint is not None:
+        twin = checkpoint.attach(stats,twin)
+
+      # Time the phases of the assimilation (see Stats.timings)
+      ptimer = stats._ptimer
+      prev, PhaseTimer.local.active = PhaseTimer.current(), ptimer
+      t0 = time.perf_counter()
+
+      # Description for progbar
+      prev_desc, Progress.local.desc = Progress.local.desc, da_method.__name__
+
       # Put assimilator inside try/catch to allow gentle failure
       try:
-        assimilator(stats,setup,xx,yy)
+        assimilator(stats,timed_setup(twin,ptimer),xx,yy)
+        stats.join_assessments()
+        if checkpoint is not None:
+          checkpoint.join()
+          checkpoint.remove(stats)
       except (AssimFailedError,ValueError,np.linalg.LinAlgError) as ERR:
         if getattr(cfg,'fail_gently',True):
           msg  = []
@@ -126,11 +188,23 @@ def DA_Config(da_method):
 
         else: # Don't fail gently.
           raise ERR
+      finally:
+        stats.join_assessments(reraise=False) # In case of failure
+        if checkpoint is not None:
+          checkpoint.join(reraise=False)
+        ptimer.add('total', time.perf_counter()-t0)
+        PhaseTimer.local.active = prev
+        Progress.local.desc = prev_desc
+        if Progress.local.sweep is not None:
+          Progress.local.sweep()
 
       return stats
     assim_caller.__doc__ = "Calls assimilator() from " +\
         da_method.__name__ +", passing it the (output) stats object. " +\
-        "Returns stats (even if an AssimFailedError is caught)."
+        "Returns stats (even if an AssimFailedError is caught). " +\
+        "If sd is not None: use a random stream of its own, seeded with sd (see rng_context). " +\
+        "If checkpoint is not None: save (and resume from) checkpoints (see Checkpoint). " +\
+        "If cache is not None: share the initial ensemble and forecasts (see ForecastCache)."
 
     ############################
     # Grab argument names/values
@@ -199,6 +273,9 @@ class DAC(ImmutableAttributes):
   dflts = {
       'liveplotting': False,
       'store_u'     : False,
+      'stats'       : None, # List of Stats.probes to compute. None: default.
+      'summary'     : False, # Only compute time-averages (of scalar stats).
+      'dtype'       : None, # Of the ensemble, e.g. 'float32'. See dtype_setup().
       }
 
   excluded =  ['assimilate',re.compile('^_')]
@@ -363,8 +440,13 @@ def print_averages(cfgs,Avrgs,attrkeys=(),statkeys=()):
       - if -1: only print da_method.
       - if  0: print distinct_attrs
   - statkeys: list of statistics to include.
+      'time' expands to the timings of all phases (see Stats.timings).
   """
 
+  # Convert records (see avrgs_to_records)
+  if isinstance(Avrgs,(np.ndarray,np.void)) and Avrgs.dtype.names:
+    Avrgs = records_to_avrgs(Avrgs)
+
   # Convert single cfg to list
   if isinstance(cfgs,DAC):
     cfgs     = List_of_Configs(cfgs)
@@ -379,6 +461,8 @@ def print_averages(cfgs,Avrgs,attrkeys=(),statkeys=()):
   if not statkeys:
     #statkeys = ['rmse_a','rmv_a','logp_m_a']
     statkeys = ['rmse_a','rmv_a','rmse_f']
+  statkeys = [key for s in statkeys for key in
+      (['time_'+phase for phase in Stats.timed_phases] if s=='time' else [s])]
 
   # Defaults attributes
   if not attrkeys:       headr = list(cfgs.distinct_attrs())
@@ -0,0 +1,240 @@
+# Performance (and accuracy) benchmarks, built from the reference
+# configurations listed (commented out) in the setup files (mods/*/*.py),
+# under the "Suggested tuning" heading, e.g.
+#   #cfgs += EnKF('Sqrt',N=24,infl=1.013,rot=True)        # 0.18
+# where the trailing number is the expected RMSE_a.
+#
+# Usage (from the DAPPER dir):
+#   python -m tools.benchmarks                  # Run all, compare to baseline
+#   python -m tools.benchmarks Lorenz63 --T 100 # Only setups matching Lorenz63
+#   python -m tools.benchmarks --save           # Run, and save as the baseline
+#   python -m tools.benchmarks --dtype float32  # Single-precision ensembles
+#   python -m tools.benchmarks --no-mem         # Skip the memory pass
+# or, from python:
+#   bench = run_benchmarks(find_benchmarks('Lorenz63'),T=100)
+#   print_benchmarks(bench,load_baseline())
+#
+# Each benchmark is run with fixed seeds, and records the wall time
+# (total, and per phase, see Stats.timings), the number of model calls
+# (and of states forecasted), and the RMSE_a. The peak memory (traced by
+# tracemalloc, i.e. including numpy arrays) is measured by re-running
+# the benchmark, since the tracing slows down (unevenly) the allocations.
+# The baseline (data/benchmarks.json) was recorded for the default T.
+# Compared to the baseline, the following regressions are flagged:
+#  - TIME: slower by more than rtol_time (and by more than 0.05 s).
+#  - MEM : peak memory larger by more than rtol_mem.
+#  - CALL: more forecasted states.
+#  - RMSE: rmse_a larger by more than rtol_rmse.
+#  - EXPT: rmse_a larger than the expected value (from the setup file)
+#          by more than rtol_expt. Only meaningful for the default T.
+#          This also measures the accuracy impact of a reduced precision (dtype).
+
+from common import *
+
+from copy import copy
+import json
+import tracemalloc
+
+baseline_file = 'data/benchmarks.json'
+
+# Further down the "Suggested tuning" section, the reference configs are often
+# for a modified setting, described in the comments (e.g. "With dkObs=5:"
+# or "#setup.t.dkObs = 12"). Parsing therefore stops at the first such description.
+_stop_parsing = re.compile(r'setup\.|dkObs|Chronology|^#\s*With\b')
+_cfg_line     = re.compile(r'^#\s*cfgs\s*\+=\s*([^#]*?)\s*(#.*)?$')
+_expected     = re.compile(r'#\s*≈?\s*(\d+\.?\d*)')
+
+def parse_setup_file(path):
+  """
+  Parse the reference configs of a setup file.
+  Returns list of (cfg_string, expected_rmse_a).
+  Configs without an expected value are not included.
+  """
+  found   = []
+  started = False
+  with open(path, encoding='utf-8') as F:
+    for line in F:
+      line  = line.strip()
+      if not started:
+        started = 'Suggested tuning' in line
+        continue
+      match = _cfg_line.match(line)
+      if match:
+        expr, comment = match.groups()
+        vals = _expected.findall(comment or '')
+        if vals:
+          found.append((expr, float(vals[0])))
+      elif _stop_parsing.search(line) and 'import setup' not in line:
+        break
+  return found
+
+def find_benchmarks(pattern='', mods_dir='mods'):
+  """
+  Find the reference configs in the setup files (whose path matches pattern).
+  Returns list of dicts with keys 'setup' (module path) 'cfg' and 'expected'.
+  """
+  bench = []
+  for path in sorted(glob.glob(os.path.join(mods_dir,'*','*.py'))):
+    if not re.search(pattern, path):
+      continue
+    module = os.path.splitext(os.path.relpath(path))[0].replace(os.sep,'.')
+    for expr, expected in parse_setup_file(path):
+      bench.append({'setup':module, 'cfg':expr, 'expected':expected})
+  return bench
+
+def bench_key(b):
+  "Identify a benchmark (for comparison with the baseline)."
+  key = b['setup'] + ' : ' + b['cfg'] + ' : T=' + str(b['T'])
+  if b.get('dtype'):
+    key += ' : ' + b['dtype']
+  return key
+
+def run_benchmarks(bench, T=None, sd=3000, dtype=None, mem=True):
+  """
+  Run the benchmarks (as found by find_benchmarks).
+  T: override the setups' experiment duration (for quicker runs).
+  dtype: precision of the ensembles (see dtype_setup), e.g. 'float32'.
+  mem: measure the peak memory (in a second, traced, run).
+  Fills in (a copy of) each benchmark with the results.
+  """
+  results = []
+  for b in bench:
+    b = dict(b, dtype=dtype)
+    try:
+      setup = importlib.import_module(b['setup']).setup
+    except Exception as ERR:
+      b['T'], b['error'] = T, repr(ERR)
+      results.append(b)
+      continue
+    if T is not None:
+      setup   = copy(setup)
+      setup.t = copy(setup.t)
+      setup.t.T = T
+    if dtype is not None:
+      setup   = copy(setup)
+      setup.dtype = dtype
+    b['T'] = setup.t.T
+    print_c('\n' + bench_key(b))
+
+    seed(sd)
+    xx,yy = simulate(setup)
+
+    # Count model calls (and the number of states forecasted)
+    counts = {'calls':0, 'states':0}
+    model  = setup.f.model
+    def counted(E,*args,**kwargs):
+      counts['calls']  += 1
+      counts['states'] += 1 if E.ndim==1 else len(E)
+      return model(E,*args,**kwargs)
+    setup_c         = copy(setup)
+    setup_c.f       = copy(setup.f)
+    setup_c.f.model = counted
+
+    try:
+      config = eval(b['cfg'])
+      seed(sd)
+      stats  = config.assimilate(setup_c,xx,yy)
+      avrgs  = stats.average_in_time()
+      b['rmse_a']      = float(avrgs['rmse_a'].val)
+      b['rmse_a_conf'] = float(avrgs['rmse_a'].conf)
+      b['time']        = stats.timings['total']
+      b['timings']     = stats.timings
+      b['f_calls']     = counts['calls']
+      b['f_states']    = counts['states']
+      if mem:
+        del stats
+        seed(sd)
+        tracemalloc.start()
+        try:
+          config.assimilate(setup,xx,yy)
+          _, peak = tracemalloc.get_traced_memory()
+        finally:
+          tracemalloc.stop()
+        b['peak_MB']   = peak/2**20
+    except Exception as ERR:
+      b['error'] = repr(ERR)
+      print(b['error'],file=sys.stderr)
+    results.append(b)
+  return results
+
+
+def load_baseline(path=baseline_file):
+  """Load baseline (list of benchmark results). Empty if it does not exist."""
+  if not os.path.isfile(path):
+    return []
+  with open(path, encoding='utf-8') as F:
+    return json.load(F)
+
+def save_baseline(results, path=baseline_file):
+  """Save results as baseline. Merges with (i.e. overwrites parts of) existing baseline."""
+  baseline = OrderedDict((bench_key(b),b) for b in load_baseline(path))
+  baseline.update((bench_key(b),b) for b in results)
+  with open(path, 'w', encoding='utf-8') as F:
+    json.dump(list(baseline.values()), F, indent=1)
+
+
+def regressions(b, base, rtol_time=0.2, rtol_mem=0.2, rtol_rmse=0.05, rtol_expt=0.2):
+  """List the regression flags of benchmark result b vis-a-vis base (may be None)."""
+  if 'error' in b:
+    return ['FAIL']
+  flags = []
+  if b['rmse_a'] > (1+rtol_expt)*b['expected']:
+    flags += ['EXPT']
+  if base is None or 'error' in base:
+    return flags
+  if b['time'] > (1+rtol_time)*base['time'] and b['time']-base['time'] > 0.05:
+    flags += ['TIME']
+  if 'peak_MB' in b and 'peak_MB' in base and b['peak_MB'] > (1+rtol_mem)*base['peak_MB']:
+    flags += ['MEM']
+  if b['f_states'] > base['f_states']:
+    flags += ['CALL']
+  if not b['rmse_a'] <= (1+rtol_rmse)*base['rmse_a']:
+    flags += ['RMSE']
+  return flags
+
+def print_benchmarks(results, baseline=(), **kwargs):
+  """
+  Print results, along with the baseline values and regression flags.
+  kwargs: forwarded to regressions().
+  Returns the number of benchmarks with regressions.
+  """
+  baseline = {bench_key(b):b for b in baseline}
+  headr = ['setup','cfg','expected','rmse_a','base','time','base','MB','base','f_states','flags']
+  rows  = []
+  nFlagged = 0
+  for b in results:
+    base  = baseline.get(bench_key(b))
+    flags = regressions(b, base, **kwargs)
+    nFlagged += bool(flags)
+    get   = lambda d, key, fmt: '' if (d is None or key not in d) else fmt.format(d[key])
+    rows.append([b['setup'].replace('mods.',''), b['cfg'], b['expected'],
+        get(b,'rmse_a','{:.3g}'),  get(base,'rmse_a','{:.3g}'),
+        get(b,'time','{:.3g}'),    get(base,'time','{:.3g}'),
+        get(b,'peak_MB','{:.3g}'), get(base,'peak_MB','{:.3g}'),
+        get(b,'f_states','{:d}'),  ' '.join(flags)])
+  print(tabulate(list(zip(*rows)), headr, inds=False))
+  return nFlagged
+
+
+if __name__ == '__main__':
+  import argparse
+  parser = argparse.ArgumentParser(description='Run the reference benchmarks of mods/*.')
+  parser.add_argument('pattern', nargs='?', default='',
+      help='regex for the setup files to include')
+  parser.add_argument('--T', type=float, default=None,
+      help='override the experiment duration')
+  parser.add_argument('--save', action='store_true',
+      help='save the results as the baseline')
+  parser.add_argument('--dtype', default=None,
+      help='precision of the ensembles, e.g. float32')
+  parser.add_argument('--no-mem', action='store_true',
+      help='do not measure the peak memory (halves the run time)')
+  parser.add_argument('--baseline', default=baseline_file)
+  args = parser.parse_args()
+
+  results = run_benchmarks(find_benchmarks(args.pattern), T=args.T, dtype=args.dtype,
+      mem=not args.no_mem)
+  nFlagged = print_benchmarks(results, load_baseline(args.baseline))
+  if args.save:
+    save_baseline(results, args.baseline)
+  sys.exit(1 if nFlagged and not args.save else 0)
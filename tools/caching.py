@@ -0,0 +1,126 @@
+# Caching of the initial ensemble and forecasts, shared between configs.
+
+from common import *
+
+from copy import copy
+import threading, hashlib
+
+class ForecastCache():
+  """
+  Memoize the initial ensemble (X0.sample) and the forecasts (f.model),
+  so that configs (e.g. those of example_2.py) that use the same setup,
+  N, and seed (i.e. state of the random stream) only compute them once.
+
+  Example:
+  cache = ForecastCache()
+  for config in cfgs:
+    seed(sd0+2)
+    stats = config.assimilate(setup,xx,yy,cache=cache)
+  print(cache)
+
+  Such configs (e.g. differing only by their infl)
+  sample the same initial ensemble, and forecast it identically
+  until the first analysis (or the first obs. window, when dkObs>1),
+  which can be expensive for large models (e.g. QG).
+  The results are identical to those obtained without the cache:
+  the entries are keyed by the exact contents (hashed) of the ensemble,
+  along with the model (or X0), t and dt (or N and the random state),
+  and sampling from the cache also restores the random state.
+
+  Only the forecasts within the first 'window' obs. windows are cached
+  (None: all, i.e. general memoization; which is only useful if the
+  ensembles coincide also later on). The forecasts outside of it
+  are computed directly (without the overhead of hashing the ensemble).
+  The memory used is bounded by maxbytes,
+  by evicting the least recently used entries.
+  The cache may be shared between threads.
+  """
+  def __init__(self,maxbytes=2**28,window=1):
+    self.maxbytes = maxbytes
+    self.window   = window
+    self.entries  = OrderedDict() # key --> (E, rng_state)
+    self.nbytes   = 0
+    self.hits     = 0
+    self.misses   = 0
+    self._lock    = threading.Lock()
+
+  @staticmethod
+  def digest(*arrays):
+    h = hashlib.sha1()
+    for a in arrays:
+      a = np.ascontiguousarray(a)
+      h.update((a.dtype.str + str(a.shape)).encode())
+      h.update(a.view(np.uint8))
+    return h.hexdigest()
+
+  def get(self,key):
+    with self._lock:
+      entry = self.entries.get(key)
+      if entry is None:
+        self.misses += 1
+      else:
+        self.hits   += 1
+        self.entries.move_to_end(key)
+      return entry
+
+  def put(self,key,E,state=None):
+    nbytes = E.nbytes
+    if nbytes > self.maxbytes:
+      return
+    with self._lock:
+      if key in self.entries:
+        return
+      self.entries[key] = (E,state)
+      self.nbytes += nbytes
+      while self.nbytes > self.maxbytes:
+        _, (E0,_) = self.entries.popitem(last=False)
+        self.nbytes -= E0.nbytes
+
+  def clear(self):
+    with self._lock:
+      self.entries.clear()
+      self.nbytes = 0
+
+  def __repr__(self):
+    return "ForecastCache(%d entries, %.3g MB, %d hits, %d misses)"%(
+        len(self.entries), self.nbytes/2**20, self.hits, self.misses)
+
+
+def cached_setup(setup,cache):
+  """
+  Shallow copy of setup, whose initial ensemble (X0.sample)
+  and forecast model are memoized by cache (a ForecastCache).
+  """
+  model, X0 = setup.f.model, setup.X0
+  sample    = X0.sample
+  t_store   = np.inf if cache.window is None else setup.t.ttObs[cache.window-1]
+
+  def cached_sample(N):
+    s   = rng().get_state()
+    key = ('X0', X0, N, cache.digest(s[1], np.array(s[2:],float)))
+    hit = cache.get(key)
+    if hit is not None:
+      E, state = hit
+      rng().set_state(state)
+      return E.copy()
+    E = sample(N)
+    cache.put(key, np.array(E), rng().get_state())
+    return E
+
+  def cached_model(E,t,dt):
+    if t >= t_store:
+      return model(E,t,dt)
+    key = ('f', model, cache.digest(E), t, dt)
+    hit = cache.get(key)
+    if hit is not None:
+      return hit[0].copy()
+    E = model(E,t,dt)
+    cache.put(key, np.array(E))
+    return E
+
+  setup           = copy(setup)
+  setup.f         = copy(setup.f)
+  setup.X0        = copy(X0)
+  setup.f.model   = cached_model
+  setup.X0.sample = cached_sample
+  return setup
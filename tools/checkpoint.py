@@ -0,0 +1,125 @@
+# Checkpointing (and resuming) of assimilations.
+
+from common import *
+
+from copy import copy
+import pickle, hashlib
+
+class Checkpoint():
+  """
+  Periodically save the state of an assimilation, so that it can be resumed
+  (e.g. after a crash or preemption) rather than started from scratch.
+
+  Example:
+  ckpt  = Checkpoint('data/checkpoints', every=100)
+  stats = config.assimilate(setup,xx,yy,checkpoint=ckpt)
+  If the run gets interrupted, simply re-run the same command:
+  it resumes from the latest checkpoint (of the same config and data),
+  and yields the same stats as an uninterrupted run.
+  The checkpoint is deleted once the assimilation has completed.
+
+  The checkpoint is made after the analysis of every 'every'-th obs. cycle,
+  and contains the state of the filter (the ensemble E, or mu and Cov),
+  the cycle (k, kObs), the state of the random stream (see rng()),
+  and the Stats so far. The snapshot is taken (pickled) in the loop,
+  while the writing to disk is done by a background thread,
+  (atomically, i.e. a checkpoint file is never only partially written).
+
+  Resuming requires that the entire state of the filter
+  be passed to stats.assess(), which is the case for the DA methods
+  listed in Checkpoint.resumable. For other methods (e.g. smoothers,
+  which also hold a lag of ensembles, or particle filters, whose weights
+  would have to be restored), and with liveplotting,
+  a warning is issued, and the assimilation is run without checkpoints.
+  NB: Stats stored on disk (see Stats.store_dir) are resumed in memory.
+  """
+  resumable = ['EnKF','EnKF_N','LETKF','SL_EAKF','ExtKF']
+
+  # Not included in the stats snapshot. The timings are those of the resumed run.
+  excluded = ['config','setup','xx','yy','lplot','_worker','_checkpoint','_ptimer']
+
+  def __init__(self,dirpath,every=100):
+    self.dirpath = dirpath
+    self.every   = every
+    self.writer  = None
+
+  def path(self,cfg,xx,yy):
+    "The checkpoint file of cfg, identified by its settings and the data."
+    h = hashlib.sha1(repr(cfg).encode())
+    h.update(np.ascontiguousarray(xx).view(np.uint8))
+    h.update(np.ascontiguousarray(yy).view(np.uint8))
+    name = cfg.da_method.__name__ + '_' + h.hexdigest()[:16] + '.pkl'
+    return os.path.join(self.dirpath, name)
+
+  def attach(self,stats,twin):
+    """
+    Make stats save the checkpoints (see Stats._assess).
+    Resume from the existing checkpoint, if any.
+    Returns the twin setup to be used by the assimilator
+    (which, if resuming, continues from the checkpoint).
+    """
+    cfg = stats.config
+    if cfg.da_method.__name__ not in Checkpoint.resumable or cfg.liveplotting:
+      warnings.warn("Checkpoints are not supported for " + repr(cfg))
+      return twin
+    path = self.path(cfg,stats.xx,stats.yy)
+    stats._checkpoint = (self, path)
+    if not os.path.isfile(path):
+      return twin
+
+    with open(path,'rb') as F:
+      ckpt = pickle.load(F)
+    print("Resuming from checkpoint (k=%d)"%ckpt['k'], path)
+    stats.__dict__.update(ckpt['stats'])
+    stats._resumed_at = ckpt['k']
+    rng().set_state(ckpt['rng'])
+
+    # Make the assimilator continue from the checkpoint
+    twin     = copy(twin)
+    twin.t   = copy(twin.t)
+    twin.t.k_start = ckpt['k']
+    state    = ckpt['state']
+    if 'E' in state:
+      twin.X0        = copy(twin.X0)
+      twin.X0.sample = lambda N: state['E'].copy()
+    else:
+      C        = state['Cov']
+      twin.X0  = GaussRV(mu=state['mu'], C=C if isinstance(C,CovMat) else CovMat(C,'full'))
+    return twin
+
+  def save(self,stats,path,k,kObs,**state):
+    "Snapshot (and write, in the background) the checkpoint, if kObs is due."
+    if (kObs+1) % self.every:
+      return
+    # Wait for pending (background) assessments, so that stats are complete
+    if stats._worker is not None:
+      stats._worker.wait()
+    snapshot = {key: val for key,val in vars(stats).items()
+        if key not in Checkpoint.excluded}
+    ckpt = pickle.dumps({'k':k, 'kObs':kObs, 'rng':rng().get_state(),
+      'state':{key: val for key,val in state.items() if val is not None},
+      'stats':snapshot}, pickle.HIGHEST_PROTOCOL)
+    if self.writer is None:
+      self.writer = BackgroundWorker(1)
+    self.writer.submit(self._write, path, ckpt)
+
+  @staticmethod
+  def _write(path,data):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    fd, tmp = tempfile.mkstemp(suffix='.pkl',dir=os.path.dirname(path) or '.')
+    with os.fdopen(fd,'wb') as F:
+      F.write(data)
+    os.replace(tmp, path)
+
+  def join(self,reraise=True):
+    "Wait for the checkpoint writes to finish."
+    if self.writer is not None:
+      writer, self.writer = self.writer, None
+      writer.join(reraise)
+
+  def remove(self,stats):
+    "Delete the checkpoint of stats (once the assimilation has completed)."
+    if stats._checkpoint is not None:
+      path = stats._checkpoint[1]
+      if os.path.isfile(path):
+        os.remove(path)
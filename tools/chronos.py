@@ -160,6 +160,9 @@ class Chronology:
   ######################################
   # Other
   ######################################
+  # forecast_range starts after k_start (used to resume from a Checkpoint).
+  k_start = 0
+
   @property
   def forecast_range(self):
     """"
@@ -167,7 +170,8 @@ class Chronology:
     also providing t, dt, and kObs.
     """
     tckr = Ticker(self.tt,self.kkObs)
-    next(tckr)
+    for _ in range(1+self.k_start):
+      next(tckr)
     return tckr
 
   def obs_range(self,kObs):
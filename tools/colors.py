@@ -2,9 +2,11 @@ from common import *
 
 sns_bg = array([0.9176, 0.9176, 0.9490])
 
-# Standard color codes
-RGBs = {c: array(mpl.colors.colorConverter.to_rgb(c)) for c in 'bgrmyckw'}
-#RGBs = [mpl.colors.colorConverter.to_rgb(c) for c in 'bgrmyckw']
+# Standard color codes, i.e. mpl.colors.colorConverter.to_rgb(c),
+# hardcoded so as not to import matplotlib (and to precede the overwriting below).
+RGBs = {c: array(rgb) for c,rgb in zip('bgrmyckw',[
+  (0,0,1), (0,0.5,0), (1,0,0), (0.75,0,0.75),
+  (0.75,0.75,0), (0,0.75,0.75), (0,0,0), (1,1,1)])}
 
 # Matlab (new) colors.
 ml_colors = np.array(np.matrix("""
@@ -16,10 +18,6 @@ ml_colors = np.array(np.matrix("""
 0.3010    0.7450    0.9330;
 0.6350    0.0780    0.1840 
 """))
-# Load into matplotlib color dictionary
-for code, color in zip('boyvgcr', ml_colors):
-  mpl.colors.ColorConverter.colors['ml'+code] = color
-  mpl.colors.colorConverter.cache ['ml'+code] = color
 
 # Seaborn colors
 sns_colors = np.array(np.matrix("""
@@ -32,10 +30,18 @@ sns_colors = np.array(np.matrix("""
 0.1   , 0.1   , 0.1   ; 
 1.0   , 1.0   , 1.0    
 """))
-# Overwrite default color codes
-for code, color in zip('bgrmyckw', sns_colors):
-    mpl.colors.colorConverter.colors[code] = color
-    mpl.colors.colorConverter.cache [code] = color
+
+def register_colors():
+  "Load colors into matplotlib. Called upon its import (see common.py)."
+  colors = mpl.colors
+  # Load into matplotlib color dictionary
+  for code, color in zip('boyvgcr', ml_colors):
+    colors.ColorConverter.colors['ml'+code] = color
+    colors.colorConverter.cache ['ml'+code] = color
+  # Overwrite default color codes
+  for code, color in zip('bgrmyckw', sns_colors):
+      colors.colorConverter.colors[code] = color
+      colors.colorConverter.cache [code] = color
 
 
 def blend_rgb(rgb, a, bg_rgb=ones(3)):
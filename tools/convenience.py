@@ -1,7 +1,14 @@
 from common import *
 
-def simulate(setup,desc='Truth & Obs'):
-  """Generate synthetic truth and observations."""
+def simulate(setup,desc='Truth & Obs',sd=None):
+  """
+  Generate synthetic truth and observations.
+  If sd is not None: use a random stream of its own, seeded with sd (see rng_context).
+  """
+  if sd is not None:
+    with rng_context(sd):
+      return simulate(setup,desc)
+
   f,h,chrono,X0 = setup.f, setup.h, setup.t, setup.X0
 
   # Init
@@ -7,22 +7,89 @@ from common import *
 #########################################
 from copy import deepcopy, copy
 
+# Results are stored in a columnar format: each row is one experiment,
+# i.e. one (label,abscissa,repeat) triplet, and each field (e.g. 'rmse_a')
+# is a pair of float columns (val,conf). Labels and abscissa are stored
+# (once) in arrays, and the rows only hold (int) indices into them.
+# Missing fields (and failed experiments) are NaN.
+# The format is a plain .npz (no pickling), whose arrays get loaded
+# individually, i.e. only the fields that are requested.
+
+def avrgs_to_columns(avrgs):
+  """
+  Convert avrgs (array of dicts, with shape (nAbscissa,nRepeat,nLabels),
+  as produced by experiment scripts) to the columnar format.
+  Returns the index columns (iS,iR,iC), and a dict of field: (val,conf).
+  """
+  entries  = avrgs.ravel().tolist()
+  flat     = [n for n,a in enumerate(entries) if a is not None]
+  entries  = [entries[n] for n in flat]
+  iS,iR,iC = [ii.astype(int) for ii in np.unravel_index(flat,avrgs.shape)]
+  # Gather (row,val,conf) for each field in a single pass, then fill in arrays
+  gathered = {}
+  for n,a in enumerate(entries):
+    for key,v in a.items():
+      gathered.setdefault(key,[]).append((n,v.val,v.conf))
+  fields = OrderedDict()
+  for key in sorted(gathered):
+    rows, val, conf = zip(*gathered[key])
+    fields[key] = (np.full(len(entries),np.nan), np.full(len(entries),np.nan))
+    fields[key][0][list(rows)] = val
+    fields[key][1][list(rows)] = conf
+  return iS, iR, iC, fields
+
+def save_results(path,avrgs,abscissa,labels,**kwargs):
+  """
+  Save avrgs (see avrgs_to_columns) in the columnar format,
+  which can be loaded by ResultsTable.
+  kwargs: further (non-object) arrays to include, e.g. xx, yy.
+  """
+  iS, iR, iC, fields = avrgs_to_columns(avrgs)
+  columns = {'val_' +key: v for key,(v,c) in fields.items()}
+  columns.update({'conf_'+key: c for key,(v,c) in fields.items()})
+  np.savez_compressed(path,
+      abscissa = array(abscissa),
+      labels   = array([str(L) for L in labels]),
+      iS       = iS.astype(np.int32),
+      iR       = iR.astype(np.int32),
+      iC       = iC.astype(np.int32),
+      fields   = array(list(fields),str),
+      **columns, **kwargs)
+
+def _subset(ds,keep):
+  "Keep only the rows (experiments) of dataset ds where keep is True."
+  for key in ['iS','iR','iC','rows']:
+    ds[key] = ds[key][keep]
+  ds['loaded'] = {f: (v[keep],c[keep]) for f,(v,c) in ds['loaded'].items()}
+
+def _recode(codes,rm,n):
+  "Shift codes (indices into arange(n)) to account for the removal of the indices rm."
+  shift = np.cumsum(np.isin(arange(n),rm))
+  return codes - shift[codes]
+
+
 class ResultsTable():
   """
-  Load avrgs (array of dicts of fields of time-average statistics)
-    from .npz files which also contain arrays 'abscissa' and 'labels'.
-    Assumes avrgs.shape == (len(abscissa),nRepeat,len(labels)).
-    But the avrgs of different source files can have entirely different
+  Load the results (time-average statistics, e.g. rmse_a)
+    of experiments from .npz files, as saved by save_results().
+    The legacy format (avrgs, i.e. an array of dicts) is also supported,
+    being converted (once, and in full) upon loading.
+    The files contain arrays 'abscissa' and 'labels',
+    and the results for each (iS,iR,iC), for iS/iC indexing abscissa/labels,
+    and iR indexing the repetitions of the experiment.
+    But the results of different source files can have entirely different
     abscissa, nRepeat, labels. The sources will be properly handled
     also allowing for nan values. This flexibility allows working with
     a patchwork of "inhomogenous" sources.
-  Merge (stack) into a TABLE with shape (len(labels),len(abscissa)).
+  Merge (stack) into a table with shape (len(labels),len(abscissa)).
     Thus, all results for a given label/abscissa are easily indexed,
-    and don't even have to be of the same length
-    (TABLE[iC,iS] is a list of the avrgs for that (label,absissa)).
-  Also provides functions that partition the TABLE,
+    and don't even have to be of the same length.
+    The merged table is columnar, with the (global) indices iC, iS, iR,
+    such that group-by's (e.g. mean_field) are vectorized.
+    Fields are only loaded (from file) when requested.
+  Also provides functions that partition the table,
     (but nowhere near the power of a full database).
-  NB: the TABLE is just convenience:
+  NB: the table is just convenience:
       the internal state of ResultsTable is the dict of datasets.
 
   Examples:
@@ -71,10 +138,39 @@ class ResultsTable():
       if 0==os.path.getsize(f):
         print("Skipping empty file",f)
         continue
-      self.datasets[f] = dict(np.load(f))
+      self.datasets[f] = self._load_dataset(f)
     self.regen_table()
     return self # for chaining
 
+  @staticmethod
+  def _load_dataset(f):
+    "Load the index columns (but not the fields) of file f."
+    with np.load(f, allow_pickle=True) as data: # pickle: for the legacy format
+      ds = {'path': f, 'abscissa': data['abscissa'], 'labels': list(data['labels'])}
+      if 'avrgs' in data.files: # legacy format
+        ds['iS'], ds['iR'], ds['iC'], ds['loaded'] = avrgs_to_columns(data['avrgs'])
+        ds['path'] = None
+      else:
+        ds['iS'], ds['iR'], ds['iC'] = [data[k].astype(int) for k in ['iS','iR','iC']]
+        ds['loaded'] = {}
+      ds['fields'] = list(data['fields']) if 'fields' in data.files else list(ds['loaded'])
+    ds['rows'] = arange(len(ds['iS']))
+    return ds
+
+  @staticmethod
+  def _get_field(ds,field):
+    "Get (val,conf) columns of field in dataset ds, loading them if need be."
+    if field not in ds['loaded']:
+      if field in ds['fields'] and ds['path'] is not None:
+        with np.load(ds['path']) as data:
+          val  = data['val_' +field][ds['rows']]
+          conf = data['conf_'+field][ds['rows']]
+      else:
+        val  = np.full(len(ds['rows']), np.nan)
+        conf = np.full(len(ds['rows']), np.nan)
+      ds['loaded'][field] = (val,conf)
+    return ds['loaded'][field]
+
   def rm_dataset(self,pattern):
     for key in list(self.datasets):
       if re.search(pattern,key):
@@ -86,13 +182,14 @@ class ResultsTable():
     """
     from datasets, do:
      - assemble labels and abscissa
-     - generate corresponding TABLE 
+     - map the (local) indices of each dataset to the global ones,
+       with repetitions of the same (label,abscissa) being stacked.
     """
     abscissa = []
     labels   = []
     for ds in self.datasets.values():
       abscissa += [ds['abscissa']]
-      labels   += [ds['labels']]
+      labels   += [array(ds['labels'],str)]
     # Make labels and abscissa unique
     def retain_order_uniq(ar):
       _, inds = np.unique(ar,return_index=True)
@@ -102,19 +199,29 @@ class ResultsTable():
     self.abscissa = abscissa
     self.labels   = labels
 
-    # Init
-    TABLE  = np.empty(self.shape,object)
-    for i,j in np.ndindex(TABLE.shape):
-      TABLE[i,j] = []
-    # Fill
+    iC, iS, iR = [], [], []
     fields = set()
     for ds in self.datasets.values():
-      for iC,C in enumerate(ds['labels']):
-        for iS,S in enumerate(ds['abscissa']):
-          avrgs = ds['avrgs'][iS,:,iC].tolist()
-          TABLE[labels==C,abscissa==S][0] += avrgs
-          fields |= set().union(*(a.keys() for a in avrgs))
-    self.TABLE  = TABLE
+      # Local-to-global index maps
+      mapC = array([np.nonzero(labels  ==C)[0][0] for C in ds['labels']  ],int)
+      mapS = array([np.nonzero(abscissa==S)[0][0] for S in ds['abscissa']],int)
+      iC += [mapC[ds['iC']]]
+      iS += [mapS[ds['iS']]]
+      iR += [ds['iR']]
+      fields |= set(ds['fields'])
+    iC = ccat(*iC).astype(int) if iC else zeros(0,int)
+    iS = ccat(*iS).astype(int) if iS else zeros(0,int)
+    iR = ccat(*iR).astype(int) if iR else zeros(0,int)
+
+    # Renumber repetitions (as their order of appearance) within each (iC,iS),
+    # so that sources (and merged labels) are stacked.
+    cell  = np.ravel_multi_index((iC,iS),self.shape)
+    order = np.argsort(cell,kind='mergesort') # stable, i.e. keeps source order
+    first = np.searchsorted(cell[order],cell[order])
+    rep   = np.empty_like(order)
+    rep[order] = arange(len(order)) - first
+
+    self.iC, self.iS, self.iR = iC, iS, rep
     self.fields = fields
 
   @property
@@ -125,7 +232,35 @@ class ResultsTable():
   # may differ (and may be 0). Generate 2D table counting it.
   @property
   def nRepeats(self):
-    return np.vectorize(lambda x: len(x))(self.TABLE)
+    cell = np.ravel_multi_index((self.iC,self.iS),self.shape)
+    return np.bincount(cell,minlength=prod(self.shape)).reshape(self.shape)
+
+  def columns(self,field):
+    "Get the (val,conf) columns of field for the whole table (rows ordered as iC, iS, iR)."
+    val, conf = [], []
+    for ds in self.datasets.values():
+      v, c = self._get_field(ds,field)
+      val  += [v]
+      conf += [c]
+    if not val:
+      return zeros(0), zeros(0)
+    return ccat(*val), ccat(*conf)
+
+  @property
+  def TABLE(self):
+    """
+    TABLE[iC,iS] is a list of the avrgs (dicts of val_with_conf) for that (label,absissa).
+    NB: Loads all fields. Only provided for backwards compatibility;
+    it is much faster to use the columns directly (e.g. through field() or mean_field()).
+    """
+    TABLE = np.empty(self.shape,object)
+    for i,j in np.ndindex(TABLE.shape):
+      TABLE[i,j] = [dict() for _ in range(self.nRepeats[i,j])]
+    for f in sorted(self.fields):
+      val, conf = self.columns(f)
+      for n,(i,j,r) in enumerate(zip(self.iC,self.iS,self.iR)):
+        TABLE[i,j][r][f] = val_with_conf(val[n],conf[n])
+    return TABLE
 
 
   def rm(self,cond,INV=False):
@@ -152,10 +287,9 @@ class ResultsTable():
 
     for ds in self.datasets.values():
       ii = [i for i,name in enumerate(ds['labels']) if _cond(name)]
-      ds['labels'] = np.delete(ds['labels'], ii)
-      ds['avrgs']  = np.delete(ds['avrgs'] , ii, axis=-1)
-      # stackoverflow.com/q/46611571
-      ds['avrgs']  = np.ascontiguousarray(ds['avrgs'])
+      _subset(ds, ~np.isin(ds['iC'],ii))
+      ds['iC']     = _recode(ds['iC'],ii,len(ds['labels']))
+      ds['labels'] = [name for i,name in enumerate(ds['labels']) if i not in ii]
 
     self.regen_table()
 
@@ -178,7 +312,6 @@ class ResultsTable():
     """
     if isinstance(inds,int): inds = [inds]
     for ds in self.datasets.values():
-      ds['labels'] = list(ds['labels']) # coz fixed string limits
       for i,cfg in enumerate(ds['labels']):
         if inds is None or cfg in self.labels[inds]:
           ds['labels'][i] = re.sub(regex, sub, cfg)
@@ -190,10 +323,10 @@ class ResultsTable():
     """
     D = self.abscissa[inds] # these points will be removed
     for ds in self.datasets.values():
-      keep = [i for i,a in enumerate(ds['abscissa']) if a not in D]
-      ds['abscissa'] = ds['abscissa'][keep]
-      ds['avrgs']    = ds['avrgs']   [keep]
-      ds['avrgs']    = np.ascontiguousarray(ds['avrgs'])
+      ii = [i for i,a in enumerate(ds['abscissa']) if a in D]
+      _subset(ds, ~np.isin(ds['iS'],ii))
+      ds['iS']       = _recode(ds['iS'],ii,len(ds['abscissa']))
+      ds['abscissa'] = np.delete(ds['abscissa'],ii)
     self.regen_table()
 
   def __deepcopy__(self, memo):
@@ -203,10 +336,10 @@ class ResultsTable():
     We only need to copy the datasets.
     Then regen_table essentially re-inits the object.
 
-    The speed-up is obtained by stopping the 'deep' copying
-    at the level of the arrays containing the avrgs.
-      This is admissible because the entries of avrgs
-      should never be modified, only deleted.
+    The speed-up is obtained by not copying the columns
+    (index arrays and loaded fields), which are shared.
+      This is admissible because the columns
+      are never modified in-place, only re-assigned (subsetted).
     """
     cls = self.__class__
     new = cls.__new__(cls)
@@ -215,14 +348,9 @@ class ResultsTable():
     new.datasets = OrderedDict()
 
     for k, ds in self.datasets.items():
-      new.datasets[k] = {
-          'abscissa':deepcopy(ds['abscissa']),
-          'labels'  :deepcopy(ds['labels']),
-          'avrgs'   :np.empty(ds['avrgs'].shape,dict)
-          }
-      for idx, avrg in np.ndenumerate(ds['avrgs']):
-        # 'shallow' copy of the entry
-        new.datasets[k]['avrgs'][idx] = copy(avrg)
+      new.datasets[k] = copy(ds)
+      new.datasets[k]['labels'] = list(ds['labels'])
+      new.datasets[k]['loaded'] = copy(ds['loaded'])
 
     new.regen_table()
     return new
@@ -241,41 +369,35 @@ class ResultsTable():
 
   def field(self,field):
     """
-    Extract a given field from TABLE.
+    Extract a given field from the table.
     Insert in 3D list "field3D",
     but with a fixed shape (like an array), where empty <--> None.
     Put iRepeat dimension first,
     so that repr(field3D) prints nRepeats.max() 2D-tables.
     """
     shape   = (self.nRepeats.max(),)+self.shape
-    field3D = np.full(shape, -999.9) # Value should be overwritten below
-    field3D = field3D.tolist()
+    field3D = np.full(shape, None, object)
     # Lists leave None as None, as opposed to a float ndarray.
     # And Tabulate uses None to identify 'missingval'. 
     # So we stick with lists here, to be able to print directly, e.g.
     # Results.print_field(Results.field('rmse_a')
-    for iR,iC,iS in np.ndindex(shape):
-      try:
-        field3D[iR][iC][iS] = self.TABLE[iC,iS][iR][field].val
-      except (IndexError,KeyError):
-        field3D[iR][iC][iS] = None
-    return field3D
+    field3D[self.iR,self.iC,self.iS] = self.columns(field)[0]
+    return field3D.tolist()
 
   def mean_field(self,field):
-    "Extract field"
-    field3D = self.field(field)
-    field3D = array(field3D,float) # converts None to Nan (not to be counted as fails!)
-    mu   = zeros(self.shape)
-    conf = zeros(self.shape)
-    nSuc = zeros(self.shape,int) # non-fails
-    for (iC,iS),_ in np.ndenumerate(mu):
-      nRep = self.nRepeats[iC,iS]
-      f    = field3D[:nRep,iC,iS]
-      f    = f[np.logical_not(np.isnan(f))]
-      mu  [iC,iS] = f.mean()                   if len(f)   else None
-      conf[iC,iS] = f.std(ddof=1)/sqrt(len(f)) if len(f)>3 else np.nan
-      nSuc[iC,iS] = len(f)
-    return mu, conf, nSuc
+    "Extract field, and average it over the repetitions (vectorized group-by)."
+    val  = self.columns(field)[0]
+    cell = np.ravel_multi_index((self.iC,self.iS),self.shape)
+    ok   = np.isfinite(val) # NaNs are fails
+    cell, val = cell[ok], val[ok]
+    nC   = prod(self.shape)
+    nSuc = np.bincount(cell,minlength=nC)
+    with np.errstate(divide='ignore',invalid='ignore'):
+      mu   = np.bincount(cell,val,minlength=nC) / nSuc
+      dev2 = np.bincount(cell,(val-mu[cell])**2,minlength=nC)
+      conf = sqrt(dev2/(nSuc-1)) / sqrt(nSuc)
+    conf[nSuc<=3] = np.nan
+    return mu.reshape(self.shape), conf.reshape(self.shape), nSuc.reshape(self.shape)
 
 
   def print_frame(self,frame):
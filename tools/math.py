@@ -309,6 +309,29 @@ def tsvd(A, threshold=0.99999, avoid_pathological=True):
   s  = s [  :r]
   return U,s,VT
 
+def rsvd(A, r, n_over=10, n_iter=2, rng=np.random):
+  """
+  Randomized (truncated) svd, yielding the leading r components of A.
+  Ref: Halko, Martinsson, Tropp (2011): "Finding structure with randomness".
+  Costs O(m*n*(r+n_over)*(1+2*n_iter)), vs O(m*n*min(m,n)) for the full svd.
+  n_over: oversampling of the random subspace.
+  n_iter: number of power iterations (improves accuracy when s decays slowly).
+  rng   : source of the random test matrix. Pass a separate RandomState
+          in order to not advance the global random state.
+  """
+  m,n = A.shape
+  k   = min(r+n_over, m, n)
+  Q   = A @ rng.randn(n,k)
+  for _ in range(n_iter):
+    # Re-orthonormalize (by QR) for numerical stability
+    Q,_ = nla.qr(Q)
+    Q,_ = nla.qr(A.T @ Q)
+    Q   = A @ Q
+  Q,_      = nla.qr(Q)
+  U,s,VT   = sla.svd(Q.T @ A, full_matrices=False)
+  U        = Q @ U
+  return U[:,:r], s[:r], VT[:r]
+
 def svd0(A):
   """
   Compute the 
@@ -45,13 +45,9 @@ def genOG_modified(m,opts=(0,1.0)):
     degree = opts[1]
 
   if ver==1:
-    # Only rotate "once in a while"
-    dc = 1/degree # = "while"
-    # Retrieve/store persistent variable
-    counter = getattr(genOG_modified,"counter",0) + 1
-    setattr(genOG_modified,"counter",counter)
-    # Compute rot or skip
-    if np.mod(counter, dc) < 1:
+    # Only rotate "once in a while", i.e. with probability 'degree'.
+    # Stateless (no persistent counter), so that configs don't interfere.
+    if rand(1) < degree:
       Q = genOG(m)
     else:
       Q = eye(m)
@@ -96,6 +92,72 @@ def genOG_1(N,opts=()):
   return V @ sla.block_diag(1,Q) @ V.T
 
 
+def rotate_anoms(A,opts=True):
+  """
+  Random, mean-preserving rotation of the anomalies A (N-by-m),
+  i.e. T@A with T orthogonal and T@ones(N) == ones(N),
+  applied directly to A (T is never formed).
+
+  Contrary to genOG_1(), which costs O(N^3) in forming T
+  (and T@A another O(N^2*m)), the costs here are
+  O(N^2*m) for the full rotation and O(s*N^2*m) for a partial one.
+
+  opts:
+   - True : T is Haar-distributed (as genOG_1), via Householder
+            reflections [Stewart (1980), as in scipy.stats.ortho_group].
+   - float: rotation strength s ∈ (0,1]. Applies ceil(s*(N-1)/2)
+            Givens-like rotations, each in a random plane (orthogonal to ones),
+            and with a uniformly random angle. With s=1, as many planes
+            are rotated as there are (pairs of) degrees of freedom.
+   - tuple: (ver,degree) is forwarded to genOG_modified() via genOG_1().
+  Testing: scripts/sqrt_rotations.py
+  """
+  N = len(A)
+  if N==1:
+    return A
+  if N<=2 and not isinstance(opts,tuple):
+    # Only reflection is possible for N==2 (and it's the identity for N==1).
+    opts = True
+
+  if isinstance(opts,tuple):
+    # Legacy (dense) version
+    return genOG_1(N,opts) @ A
+
+  elif isinstance(opts,(bool,int)):
+    # Householder u that swaps e_1 and ones(N)/sqrt(N).
+    # Its rows [1:] thus provide a basis orthogonal to ones.
+    u     = -ones(N)/sqrt(N)
+    u[0] += 1
+    u    /= sqrt(u@u)
+    B     = A - 2*np.outer(u, u@A)
+    B1    = B[1:]
+    # Haar-distributed orthogonal Q applied to B1 (N-1 rows).
+    # Q = H_0 @ H_1 @ ..., so apply from the back.
+    n1    = N-1
+    for n in reversed(range(n1)):
+      x     = randn(n1-n)
+      D     = np.sign(x[0]) or 1.0
+      x[0] += D*sqrt(x@x)
+      x    /= sqrt(x@x)
+      B1[n:] = -D*(B1[n:] - 2*np.outer(x, x@B1[n:]))
+    return B - 2*np.outer(u, u@B)
+
+  else:
+    # Rotate a few random planes
+    s = float(opts)
+    assert 0 < s <= 1, "Rotation strength must be in (0,1]."
+    A = A.copy()
+    for _ in range(int(ceil(s*(N-1)/2))):
+      # Orthonormal pair (u,v), orthogonal to ones.
+      U,_ = nla.qr(center(randn((N,2)),rescale=False))
+      u,v = U.T
+      th  = pi*(2*rand(1)[0]-1)
+      a,b = u@A, v@A
+      A  += (cos(th)-1)*(np.outer(u,a) + np.outer(v,b)) \
+          +  sin(th)   *(np.outer(v,a) - np.outer(u,b))
+    return A
+
+
 
 def funm_psd(a, fun, check_finite=False):
   """
@@ -271,7 +333,7 @@ class CovMat():
     else:
       return (self.Left**2).sum(axis=1)
 
-  @property
+  @lazy_property
   def Left(self):
     """L such that C = L@L.T. Note that L is typically rectangular, but not triangular,
     and that its width is somewhere betwen the rank and m."""
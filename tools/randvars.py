@@ -17,6 +17,10 @@ class RV(MLR_Print):
                         RV(m=4,func=lambda N: rand((N,4))
      - file <str>     : draw from file. Example:
                         RV(m=4,file='data/tmp.npz')
+                        with array 'sample', and optionally weights 'w'.
+                        See load_sample().
+                        Can also be a function returning the filename,
+                        e.g. one that generates the file on first use.
     The following kwords (versions) are available,
     but should not be used for anything serious (use instead subclasses, like GaussRV).
      - icdf <func(x)> : marginal/independent  "inverse transform" sampling. Example:
@@ -39,15 +43,22 @@ class RV(MLR_Print):
       E = self.func(N)
     elif hasattr(self,'file'):
       # Provided by numpy file with sample
-      data   = np.load(self.file)
-      sample = data['sample']
-      N0     = len(sample)
-      if 'w' in data:
-        w = data['w']
+      file        = self.file() if callable(self.file) else self.file
+      sample, tbl = load_sample(file)
+      N0          = len(sample)
+      if tbl is None:
+        # Same draw (i.e. random numbers) as with the (former) uniform weights
+        idx = rng().choice(N0,N,replace=True,p=ones(N0)/N0)
       else:
-        w = ones(N0)/N0
-      idx = np.random.choice(N0,N,replace=True,p=w)
-      E   = sample[idx]
+        # Weighted draw, by the alias method.
+        # NB: this draws other random numbers than rng().choice(...,p=w).
+        prob, alias = tbl
+        idx = rng().randint(N0,size=N)
+        idx = np.where(rand(N) < prob[idx], idx, alias[idx])
+      # Only the selected rows are read from disk (in sorted order)
+      order    = np.argsort(idx)
+      E        = np.empty((N,self.m))
+      E[order] = sample[idx[order]]
     elif hasattr(self,'icdf'):
       # Independent "inverse transform" sampling
       icdf = np.vectorize(self.icdf)
@@ -77,6 +88,63 @@ class RV(MLR_Print):
     return E
 
 
+def alias_table(w):
+  """
+  Vose's alias table for drawing from the (normalized) weights w in O(1):
+  draw i uniformly, and keep it w.p. prob[i], otherwise return alias[i].
+  """
+  N     = len(w)
+  prob  = N*asarray(w,dtype=float)/sum(w)
+  alias = arange(N)
+  small = list(np.nonzero(prob< 1)[0])
+  large = list(np.nonzero(prob>=1)[0])
+  while small and large:
+    s, l     = small.pop(), large[-1]
+    alias[s] = l
+    prob[l] -= 1 - prob[s]
+    if prob[l] < 1:
+      small.append(large.pop())
+  prob[small+large] = 1 # Remainders (round-off)
+  return prob, alias
+
+# Samples loaded from files, shared across RVs (and configs) of this process.
+_loaded_samples = {}
+
+def load_sample(file):
+  """
+  Load the 'sample' (and, optionally, weights 'w') from an .npz file
+  (or just the sample, from an .npy file).
+
+  The sample is re-saved (once) as an uncompressed .npy sidecar
+  (next to the .npz), which is then opened memory-mapped,
+  so that drawing N members only reads those rows from disk.
+  Returns (sample, tbl), where tbl is the alias_table of the weights,
+  or None if the weights are uniform (or absent).
+  The result is cached (per path and modification time).
+  """
+  file  = os.path.abspath(file)
+  key   = (file, os.path.getmtime(file))
+  if key not in _loaded_samples:
+    if file.endswith('.npy'):
+      path, w = file, None
+    else:
+      path = os.path.splitext(file)[0] + '_sample.npy'
+      data = np.load(file)
+      w    = data['w'] if 'w' in data else None
+      if not os.path.isfile(path) or os.path.getmtime(path) < key[1]:
+        # Write to tmp and rename, in case of concurrent processes
+        fd, tmp = tempfile.mkstemp(suffix='.npy',dir=os.path.dirname(path))
+        with os.fdopen(fd,'wb') as f:
+          np.save(f, data['sample'])
+        os.replace(tmp, path)
+    sample = np.load(path, mmap_mode='r')
+    if w is not None and np.all(w==w[0]):
+      w = None
+    tbl = None if w is None else alias_table(w)
+    _loaded_samples[key] = sample, tbl
+  return _loaded_samples[key]
+
+
 class RV_with_mean_and_cov(RV):
   """
   Generic multivariate random variable
@@ -166,7 +234,7 @@ class LaplaceRV(RV_with_mean_and_cov):
   """
   def _sample(self,N):
     R = self.C.Right
-    z = np.random.exponential(1,N)
+    z = rng().exponential(1,N)
     D = randn((N,len(R)))
     D = z[:,None]*D
     return D @ R / sqrt(2)
@@ -179,7 +247,7 @@ class LaplaceParallelRV(RV_with_mean_and_cov):
   def _sample(self,N):
     #R = self.C.Right   # contour: sheared rectangle
     R = self.C.sym_sqrt # contour: rotated rectangle
-    D = np.random.laplace(0,1,(N,len(R)))
+    D = rng().laplace(0,1,(N,len(R)))
     return D @ R / sqrt(2)
 
 
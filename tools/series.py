@@ -13,12 +13,20 @@ def auto_cov(xx,L=5,periodic=False,corr=False):
   N     = len(xx)
   mu    = mean(xx,0)
   A     = xx - mu
-  acovf = zeros((L,)+np.shape(mu))
 
-  for i in range(L):
-    Left     = A.take(arange(N-i),0)
-    Right    = A.take(arange(i,N),0)
-    acovf[i] = (Left*Right).sum(0)/(N-i-1)
+  if L <= 10*np.log2(N):
+    # Direct: O(L*N). Faster than FFT unless L is large.
+    acovf = zeros((L,)+np.shape(mu))
+    for i in range(L):
+      acovf[i] = (A[:N-i]*A[i:]).sum(0)
+  else:
+    # By FFT (Wiener-Khinchin): O(N*log(N)).
+    # Zero-pad to avoid wrap-around (i.e. circular correlation).
+    n     = 2**int(np.ceil(np.log2(2*N-1)))
+    FA    = np.fft.rfft(A,n,axis=0)
+    acovf = np.fft.irfft(FA*FA.conj(),n,axis=0)[:L]
+
+  acovf /= (N-1-arange(L)).reshape((L,)+(1,)*(A.ndim-1))
 
   if corr:
     acovf /= acovf[0].copy()
@@ -51,9 +59,12 @@ def estimate_corr_length(xx):
   For explanation, see mods.LA.core: homogeneous_1D_cov().
   Also note that, for exponential corr function, as assumed here,
   corr(L) = exp(-1) = ca 0.368
+  If xx is 2D, its columns are treated as separate series,
+  and their ACFs are averaged (rather than ravelling xx).
   """
-  assert is1d(xx)
   acovf = auto_cov(xx,min(100,len(xx)-2))
+  if acovf.ndim > 1:
+    acovf = mean(acovf,1)
   a     = fit_acf_by_AR1(acovf)
   if a == 0:
     L = 0
@@ -83,12 +94,23 @@ def series_mean_with_conf(xx):
   Compute series mean.
   Also provide confidence of mean,
   as estimated from its correlation-corrected variance.
+  If xx is 2D, its rows are treated as (equally long) separate series,
+  which are processed at once. A list of val_with_conf is then returned.
   """
+  if np.ndim(xx) == 2:
+    return _series_means_with_conf(xx)
   mu    = mean(xx)
   N     = len(xx)
   if np.allclose(xx,mu):            return val_with_conf(mu, 0)
   if (not np.isfinite(mu)) or N<=5: return val_with_conf(mu, np.nan)
   acovf = auto_cov(xx,5)
+  return mean_with_conf_from_acf(mu,N,acovf)
+
+def mean_with_conf_from_acf(mu,N,acovf):
+  """
+  The final part of series_mean_with_conf(),
+  which only requires the mean, length, and (short) ACF of the series.
+  """
   v     = acovf[0]
   v    /= N
   # Estimate (fit) ACF
@@ -108,6 +130,84 @@ def series_mean_with_conf(xx):
   return vc
 
 
+def _series_means_with_conf(xx):
+  "Vectorized series_mean_with_conf (for the rows of xx)."
+  n, N  = xx.shape
+  mu    = mean(xx,1)
+  conf  = np.full(n, nan)
+  with np.errstate(all='ignore'):
+    const = np.all(np.isclose(xx,mu[:,None]),1) # As np.allclose
+    ok    = ~const & np.isfinite(mu) & (N>5)
+    if ok.any():
+      acovf = auto_cov(xx[ok].T,5)
+      # Vectorized fit_acf_by_AR1: geometric mean of the ratios acf[i]/acf[i-1],
+      # as long as acf[:i+1] > 0.
+      pos   = np.cumprod(acovf>0, 0).astype(bool)
+      nPos  = pos.sum(0)
+      logr  = np.where(pos[1:], log(acovf[1:]/acovf[:-1]), 0)
+      a     = exp(logr.sum(0)/np.maximum(nPos-1,1))
+      a[nPos==1] = 0.01
+      a[nPos==0] = 0
+      # As in mean_with_conf_from_acf
+      c        = ( (N-1)*a - N*a**2 + a**(N+1) ) / (1-a)**2
+      conf[ok] = sqrt(acovf[0]/N * (1 + 2/N * c))
+  return [val_with_conf(m, 0 if cn else c if np.isnan(c) else round2sigfig(c))
+      for m, c, cn in zip(mu, conf, const)]
+
+
+class SeriesAccumulator():
+  """
+  Streaming (online) version of series_mean_with_conf().
+
+  Values are pushed one at a time, and only O(L) numbers are kept:
+  the sum, the sums of lagged products (lags 0,...,L-1),
+  the first and last L-1 values, and the min and max.
+  The ACF is computed (as in auto_cov) by expanding the products of anomalies.
+  To avoid cancellation errors, the values are shifted by the first one.
+  """
+  def __init__(self,L=5):
+    self.L     = L
+    self.N     = 0
+    self.S     = 0.0
+    self.P     = zeros(L)  # Sums of lagged products
+    self.first = zeros(L-1)
+    self.last  = zeros(L-1) # Most recent at [0]
+    self.min   = +np.inf
+    self.max   = -np.inf
+
+  def push(self,x):
+    if self.N==0:
+      self.shift = x
+    y = x - self.shift
+    if self.N < self.L-1:
+      self.first[self.N] = y
+    self.P[0]   += y*y
+    self.P[1:]  += self.last*y
+    self.last    = np.roll(self.last,1)
+    self.last[0] = y
+    self.S      += y
+    self.N      += 1
+    self.min     = min(self.min,x)
+    self.max     = max(self.max,x)
+
+  def mean_with_conf(self):
+    N, L = self.N, self.L
+    if N==0: return val_with_conf(nan, nan)
+    mu = self.shift + self.S/N
+    # As in np.allclose(xx,mu):
+    if max(self.max-mu, mu-self.min) <= 1e-8 + 1e-5*abs(mu):
+      return val_with_conf(mu, 0)
+    if (not np.isfinite(mu)) or N<=L: return val_with_conf(mu, np.nan)
+    # Anomaly product sums, for each lag i: sum_j (y[j]-m)*(y[j+i]-m)
+    m     = self.S/N
+    ii    = arange(L)
+    S_lft = self.S - np.append(0,np.cumsum(self.last )) # excl. last  i
+    S_rgt = self.S - np.append(0,np.cumsum(self.first)) # excl. first i
+    acovf = self.P - m*(S_lft + S_rgt) + (N-ii)*m**2
+    acovf/= N-ii-1
+    return mean_with_conf_from_acf(mu,N,acovf)
+
+
 class WeightedSeries(MLR_Print):
   """
   Light-weight implementation of a rolling, weighted series.
@@ -151,6 +251,9 @@ class FAU_series(MLR_Print):
       then you should use a simple np.array instead.
   """
 
+  # Validate keys also in the fast (write/read) access. 
+  debug = False
+
   # Used by MLR_Print
   included = MLR_Print.included + ['f','a','store_u']
   aliases  = {
@@ -159,17 +262,26 @@ class FAU_series(MLR_Print):
       'u':'All      (.u)'}
   aliases  = {**MLR_Print.aliases, **aliases}
 
-  def __init__(self,chrono,m,store_u=True,**kwargs):
+  def __init__(self,chrono,m,store_u=True,summary=False,store_dir=None,**kwargs):
     """
     Constructor.
      - chrono  : a Chronology object.
      - m       : len (or shape) of items in series. 
      - store_u : if False: only the current value is stored.
+     - summary : if True: the series is not stored. Instead, the values
+                 (past BurnIn) are accumulated for average() on the fly,
+                 which requires that they be set in chronological order.
+                 Only for univariate (scalar) series.
+     - store_dir: if not None: store the series (.a, .f, .u) on disk,
+                 as .npy files in this dir, which are memory-mapped,
+                 i.e. written/read lazily (by the OS, page by page).
+                 They can be re-opened with np.load(path, mmap_mode='r').
      - kwargs  : passed on to ndarrays.
     """
 
     self.store_u = store_u
     self.chrono  = chrono
+    self.summary = summary
 
     # Convert int-len to shape-tuple
     self.m = m # store first
@@ -177,31 +289,49 @@ class FAU_series(MLR_Print):
       if m==1: m = ()
       else:    m = (m,)
 
-    self.a   = np.full((chrono.KObs+1,)+m, nan, **kwargs)
-    self.f   = np.full((chrono.KObs+1,)+m, nan, **kwargs)
+    if summary:
+      if self.m > 1:
+        raise ValueError("Only univariate series can be summary-only.")
+      subs = 'afu' if store_u else 'af'
+      self._accs = {sub: SeriesAccumulator() for sub in subs}
+      self._prev = {sub: -1                  for sub in subs}
+      # First index past BurnIn (NB: the masks are monotonic)
+      i_BI       = lambda mask: len(mask) - mask.sum()
+      self._i_BI = {'f': i_BI(chrono.maskObs_BI),
+                    'a': i_BI(chrono.maskObs_BI),
+                    'u': i_BI(chrono.mask_BI)}
+      return
+
+    if store_dir is None:
+      full = lambda sub,shape: np.full(shape, nan, **kwargs)
+    else:
+      os.makedirs(store_dir, exist_ok=True)
+      def full(sub,shape):
+        path = os.path.join(store_dir, sub+'.npy')
+        arr  = np.lib.format.open_memmap(path, 'w+', shape=shape, **kwargs)
+        np.copyto(arr, nan, casting='unsafe') # as np.full
+        return arr
+
+    self.a   = full('a',(chrono.KObs+1,)+m)
+    self.f   = full('f',(chrono.KObs+1,)+m)
     if self.store_u:
-      self.u = np.full((chrono.K   +1,)+m, nan, **kwargs)
+      self.u = full('u',(chrono.K   +1,)+m)
     else:
       self.tmp   = np.full(m, nan, **kwargs)
       self.k_tmp = None
   
   def validate_key(self,key):
-    try:
-      # Assume key = (k,kObs,fau)
-      if not isinstance(key,tuple):                    raise ValueError
-      k,kObs,fau = key                      #Will also raise ValueError
-      if not isinstance(fau,str):                      raise ValueError
-      if not all([letter in 'fau' for letter in fau]): raise ValueError
-      #
-      if kObs is None:
-        for ltr in 'af':
-          if ltr in fau:
-            raise KeyError("Accessing ."+ltr+" series, but kObs is None.")
-      elif k != self.chrono.kkObs[kObs]:
-        raise KeyError("kObs indicated, but k!=kkObs[kObs]")
-    except ValueError:
-      # Assume key = k
-      key = (key,None,'u')
+    # Assume key = (k,kObs,fau) if it looks like that. Else, key = k.
+    if not (isinstance(key,tuple) and len(key)==3 and isinstance(key[2],str)
+        and all([letter in 'fau' for letter in key[2]])):
+      return (key,None,'u')
+    k,kObs,fau = key
+    if kObs is None:
+      for ltr in 'af':
+        if ltr in fau:
+          raise KeyError("Accessing ."+ltr+" series, but kObs is None.")
+    elif k != self.chrono.kkObs[kObs]:
+      raise KeyError("kObs indicated, but k!=kkObs[kObs]")
     return key
 
   def split_dims(self,k):
@@ -216,7 +346,21 @@ class FAU_series(MLR_Print):
     return k0, k1
 
   def __setitem__(self,key,item):
-    k,kObs,fau = self.validate_key(key)
+    self.write(self.validate_key(key),item)
+
+  def write(self,key,item):
+    """
+    Fast version of __setitem__, used by Stats:
+    key must be (k,kObs,fau), and it is not validated (except in debug mode).
+    """
+    if FAU_series.debug:
+      key = self.validate_key(key)
+    k,kObs,fau = key
+    if self.summary:
+      for sub in fau:
+        if sub in self._accs:
+          self._accumulate(sub, kObs if sub in 'af' else k, item)
+      return
     if 'f' in fau:
       self.f[kObs]   = item
     if 'a' in fau:
@@ -229,18 +373,43 @@ class FAU_series(MLR_Print):
         self.k_tmp   = k0
         self.tmp[k1] = item
 
+  def _accumulate(self,sub,i,item):
+    if i < self._i_BI[sub]:
+      return
+    if i <= self._prev[sub]:
+      raise RuntimeError("Summary-only series must be set chronologically,"+
+          " but ."+sub+"["+str(i)+"] was set after ."+sub+"["+str(self._prev[sub])+"].")
+    self._prev[sub] = i
+    self._accs[sub].push(item)
+
   def __getitem__(self,key):
     k,kObs,fau = self.validate_key(key)
 
     # Check consistency. NB: Somewhat time-consuming.
     for sub in fau[1:]:
-      i1 = self[k,kObs,sub]
-      i2 = self[k,kObs,fau[0]]
+      i1 = self._read((k,kObs,sub))
+      i2 = self._read((k,kObs,fau[0]))
       if np.any(i1!=i2):
         if not (np.all(np.isnan(i1)) and np.all(np.isnan(i2))):
           raise RuntimeError(
             "Requested item from multiple ('."+fau+"') series, " +\
             "But the items are not equal.")
+    return self._read((k,kObs,fau))
+
+  def read(self,key):
+    """
+    Fast version of __getitem__:
+    key must be (k,kObs,fau), and it is not validated (except in debug mode),
+    nor are the items of multiple series (e.g. 'au') checked for equality.
+    """
+    if FAU_series.debug:
+      return self[key]
+    return self._read(key)
+
+  def _read(self,key):
+    k,kObs,fau = key
+    if self.summary:
+      raise KeyError("This series is summary-only, i.e. not stored.")
     if 'f' in fau:
       return self.f[kObs]
     elif 'a' in fau:
@@ -269,17 +438,34 @@ class FAU_series(MLR_Print):
       raise NotImplementedError
     avrg = {}
     t = self.chrono
+    if self.summary:
+      for sub, acc in self._accs.items():
+        inds = t.kk_BI if sub=='u' else t.kkObs_BI
+        if acc.N == len(inds):
+          avrg[sub] = acc.mean_with_conf()
+        else: # As for the nan's of incomplete series
+          avrg[sub] = val_with_conf(nan, nan)
+      return avrg
+    for sub, series in self.series_BI().items():
+      avrg[sub] = series_mean_with_conf(series)
+    return avrg
+
+  def series_BI(self):
+    "The (stored) sub-series, past BurnIn."
+    t  = self.chrono
+    ss = OrderedDict()
     for sub in 'afu':
       if sub=='u':
         inds = t.kk_BI
       else:
         inds = t.maskObs_BI
       if hasattr(self,sub):
-        series = getattr(self,sub)[inds]
-        avrg[sub] = series_mean_with_conf(series)
-    return avrg
+        ss[sub] = getattr(self,sub)[inds]
+    return ss
 
   def __repr__(self):
+    if self.summary:
+      return type(self).__name__ + " (summary-only): " + str(self.average())
     if self.store_u:
       # Create instance version of 'included'
       self.included = self.included + ['u']
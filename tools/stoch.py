@@ -2,9 +2,55 @@
 
 from common import *
 
+import threading, contextlib, hashlib
+_local = threading.local()
+
+def rng():
+  """
+  The current random stream: the one set by rng_context() (in this thread),
+  or else the global (legacy) state of np.random.
+  All of the sampling (rand, randn, RV.sample, resampling, ...) goes through it.
+  """
+  stream = getattr(_local,'stream',None)
+  return np.random.mtrand._rand if stream is None else stream
+
+@contextlib.contextmanager
+def rng_context(sd):
+  """
+  Make a new random stream, seeded with sd, the current one (in this thread).
+
+  Example:
+  with rng_context(spawn_seed(sd0,iS,iR,iC)):
+    stats = config.assimilate(setup,xx,yy)
+
+  Since the stream is local to the thread, and spawn_seed does not depend
+  on the order of execution, the random numbers drawn by the configs
+  (settings, repeats) are the same whether they are run serially,
+  or concurrently (in threads or processes).
+  The rest of the per-run state of assim_caller (the PhaseTimer,
+  and the progress description/sweep) is also local to the thread,
+  so the stats are then identical to those of a serial run
+  (except the timings, of course). NB: liveplotting is not thread-safe.
+  """
+  prev = getattr(_local,'stream',None)
+  _local.stream = np.random.RandomState(sd)
+  try:
+    yield _local.stream
+  finally:
+    _local.stream = prev
+
+def spawn_seed(sd,*keys):
+  """
+  Derive a seed from the root seed sd and keys,
+  e.g. the indices of the (setting, repeat, config).
+  Use ints or strings for the keys (their repr must not vary between runs).
+  """
+  h = hashlib.sha256(repr((sd,)+keys).encode())
+  return int.from_bytes(h.digest()[:4],'little')
+
 def seed(i=None):
   """
-  Seed random number generator.
+  Seed random number generator (i.e. the current stream, see rng()).
   If i==None, then the clock is used to seed.
 
   This (suboptimal) wrapper returns a seed,
@@ -20,8 +66,8 @@ def seed(i=None):
   Out: array([ 0.49671415])
   """
   if i==None:
-    np.random.seed() # Init by clock.
-    state = np.random.get_state()
+    rng().seed() # Init by clock.
+    state = rng().get_state()
     i     = state[1][0] # Set seed to state[0]
   if i==0:
     warnings.warn('''
@@ -30,7 +76,7 @@ def seed(i=None):
     seed_k = k*seed_0 for experiment k. But if seed_0 is 0,
     then all seed_k will be the same (0).]''')
 
-  np.random.seed(i)
+  rng().seed(i)
   return i
 
 def seed_init(i=None):
@@ -98,6 +144,6 @@ def myrandn(shape=(1,)):
   return sqrt(pi/8.) * log(u/(1-u))
 
 # Use built-in generator
-def rand( shape=(1,)): return np.random.uniform(0,1,shape)
-def randn(shape=(1,)): return np.random.normal (0,1,shape)
+def rand( shape=(1,)): return rng().uniform(0,1,shape)
+def randn(shape=(1,)): return rng().normal (0,1,shape)
 
@@ -0,0 +1,172 @@
+# Tuning of the (hyper)parameters of a DA method, e.g. infl, loc_rad, N.
+
+from common import *
+
+from copy import copy
+import itertools
+import signal
+
+def tune(cfg, setup, grid, T0=None, eta=3, sd=3000, key='rmse_a', nconf=2, workers=None):
+  """
+  Tune the parameters of cfg (a DAC), i.e. find the best combination
+  (in terms of the time-average of key) of the values listed in grid.
+
+  The candidates, cfg.update_settings(**params), are all run on the same truth
+  (and obs), simulated (with seed sd) for the full duration, setup.t.T.
+  Rather than running each candidate for the full duration ("brute force"),
+  the candidates are eliminated early by successive halving:
+  in each round, the remaining candidates are run for a time-length T,
+  starting with T0, and multiplied by eta in each round, up to setup.t.T.
+  After each round, the following candidates are eliminated:
+   - diverged: the average is not finite (or the assimilation failed).
+   - inferior: the average is clearly (as measured by the nconf-sigma
+               confidence intervals of series_mean_with_conf) worse
+               than that of the best candidate.
+   - halved  : all but the best 1/eta of the candidates of the round.
+  The rounds continue until a single candidate remains,
+  or the full duration has been run.
+  Each round uses the same seed for all candidates (common random numbers),
+  so that the comparisons are not blurred by the sampling noise.
+  The results do not depend on the number of workers (see rng_context).
+
+  grid: dict of parameter name --> list of values. Example:
+  >>> ranking = tune(EnKF('Sqrt',N=20), setup,
+  >>>   dict(infl=[1.0,1.01,1.02,1.04,1.08], rot=[False,True]), T0=20)
+  >>> print_tuning(ranking)
+  T0: the duration of the first round. Must exceed the BurnIn.
+      Default: setup.t.T/eta**(number of halvings needed).
+  workers: the number of processes to run the candidates in parallel.
+      Default: cpu_count()-1. Use workers=1 to run in the current process.
+
+  Returns the ranking: a list of Bunch (with attributes
+  params, cfg, T, avrg, status), sorted by T reached, and then by avrg.val.
+  """
+  names  = list(grid)
+  combos = list(itertools.product(*(grid[n] for n in names)))
+  if not combos:
+    raise ValueError("Empty grid.")
+
+  # Only compute the required stats
+  probe   = key.rsplit('_',1)[0]
+  kwargs  = dict(summary=True)
+  if probe in Stats.probes:
+    kwargs['stats'] = [probe]
+  cands = [Bunch(params=OrderedDict(zip(names,c)), T=None, avrg=None, status='')
+      for c in combos]
+  for c in cands:
+    c.cfg = cfg.update_settings(**c.params, **kwargs)
+
+  # Schedule of durations
+  T_full = setup.t.T
+  if T0 is None:
+    T0 = T_full / eta**ceil(log(len(cands))/log(eta) - 1e-8)
+  if T0 <= setup.t.BurnIn:
+    raise ValueError("T0 must exceed the BurnIn (%g)."%setup.t.BurnIn)
+
+  if workers is None:
+    workers = multiprocessing.cpu_count()-1
+
+  xx,yy = simulate(setup,sd=sd)
+
+  alive = cands
+  T     = min(T0,T_full)
+  for iRound in itertools.count():
+    # Truncate the experiment
+    twin   = copy(setup)
+    twin.t = copy(setup.t)
+    twin.t.T = T
+    chrono = twin.t
+
+    nRun = len(alive)
+    desc = 'Tuning round %d: %d candidates, T=%g'%(iRound,len(alive),chrono.T)
+    job  = (twin, xx[:chrono.K+1], yy[:chrono.KObs+1],
+        spawn_seed(sd,'tuning',iRound), key)
+    for i, avrg in _run_candidates([c.cfg for c in alive], job, workers, desc):
+      alive[i].T    = chrono.T
+      alive[i].avrg = avrg
+
+    # Eliminate
+    for c in alive:
+      if not np.isfinite(c.avrg.val):
+        c.status = 'diverged'
+    alive = [c for c in alive if not c.status]
+    if not alive:
+      break
+    alive.sort(key=lambda c: c.avrg.val)
+    best  = alive[0].avrg
+    bound = best.val + nconf*best.conf
+    for c in alive:
+      if c.avrg.val - nconf*c.avrg.conf > bound:
+        c.status = 'inferior'
+    alive = [c for c in alive if not c.status]
+
+    if len(alive)==1 or T >= T_full:
+      break
+
+    nKeep = int(ceil(nRun/eta))
+    for c in alive[nKeep:]:
+      c.status = 'halved'
+    alive = alive[:nKeep]
+    T     = min(T*eta,T_full)
+
+  def rank(c):
+    val = c.avrg.val if np.isfinite(c.avrg.val) else np.inf
+    return (-c.T, c.status=='diverged', val)
+  return sorted(cands, key=rank)
+
+
+# Set (in the parent process) before the workers are forked,
+# so that the setup and configs (often holding lambdas) need not be pickled.
+_tuning_job = None
+
+def _run_candidate(i):
+  cfgs, twin, xx, yy, sd, key = _tuning_job
+  cfg = cfgs[i]
+  try:
+    avrgs = cfg.assimilate(twin,xx,yy,sd=sd).average_in_time()
+    avrg  = avrgs[key]
+    avrg  = val_with_conf(float(avrg.val),float(avrg.conf))
+  except Exception as ERR:
+    print("Tuning: %s failed: %r"%(cfg,ERR),file=sys.stderr)
+    avrg  = val_with_conf(np.nan,np.nan)
+  return i, avrg
+
+def _init_worker():
+  signal.signal(signal.SIGINT, signal.SIG_IGN)
+  Progress.mode        = 'off'
+  Progress.local.sweep = None # That of the parent
+
+def _run_candidates(cfgs, job, workers, desc):
+  """Yield (index, avrg) of each cfg, running them in parallel processes."""
+  global _tuning_job
+  _tuning_job = (cfgs,) + job
+  args = range(len(cfgs))
+  try:
+    with sweep_progress(len(cfgs),desc):
+      if workers <= 1 or len(cfgs)==1:
+        for a in args:
+          yield _run_candidate(a)
+        return
+      pool = multiprocessing.Pool(min(workers,len(cfgs)), _init_worker)
+      try:
+        for result in pool.imap_unordered(_run_candidate, args):
+          Progress.local.sweep()
+          yield result
+        pool.close()
+      finally:
+        pool.terminate()
+        pool.join()
+  finally:
+    _tuning_job = None
+
+
+def print_tuning(ranking):
+  """Print the ranking returned by tune()."""
+  names = list(ranking[0].params) if ranking else []
+  headr = names + ['T', 'avrg', '±', 'status']
+  cols  = [[c.params[n] for c in ranking] for n in names]
+  cols += [[c.T for c in ranking]]
+  cols += list(zip(*[c.avrg._str() if np.isfinite(c.avrg.val) else ('nan','')
+      for c in ranking])) or [[],[]]
+  cols += [[c.status for c in ranking]]
+  print(tabulate(cols, headr, inds=False))
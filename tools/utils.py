@@ -5,51 +5,138 @@ from common import *
 #########################################
 # Progressbar
 #########################################
+import time, threading
+
+class _ProgressLocal(threading.local):
+  desc  = None
+  sweep = None
+
+class Progress:
+  """
+  Global settings of the progress reporting (progbar, sweep_progress).
+   - mode: 'bar' : progress bars (tqdm, if installed).
+           'log' : throttled log lines (e.g. for batch jobs).
+           'off' : no reporting (and no overhead).
+   - interval: min. number of seconds between log lines.
+  And the state of the current thread (Progress.local):
+   - desc : default description (set by assim_caller to the DA method name).
+   - sweep: the active sweep_progress(), if any. NB: it is not seen by
+            the assimilations running in other threads (which report
+            their progress individually, unless mode is 'off').
+  Example: Progress.mode = 'off'
+  """
+  mode     = 'bar'
+  interval = 10
+  local    = _ProgressLocal()
+
 def noobar(itrble, desc):
   """Simple progress bar. To be used if tqdm not installed."""
   L  = len(itrble)
+  p0 = 0
   print('{}: {: >2d}'.format(desc,0), end='')
   for k,i in enumerate(itrble):
     yield i
-    p = (k+1)/L
-    e = '' if k<(L-1) else '\n'
-    print('\b\b\b\b {: >2d}%'.format(int(100*p)), end=e)
-    sys.stdout.flush()
+    p = int(100*(k+1)/L)
+    if p > p0 or k==(L-1):
+      p0 = p
+      e  = '' if k<(L-1) else '\n'
+      print('\b\b\b\b {: >2d}%'.format(p), end=e)
+      sys.stdout.flush()
+
+def _log_line(desc,i,L,t0):
+  elapsed = time.time() - t0
+  eta     = elapsed*(L-i)/i if i else nan
+  print('{}: {:d}/{:d} ({:.0f}%). Elapsed: {:.0f}s. Remaining: {:.0f}s.'.format(
+    desc, i, L, 100*i/L, elapsed, eta), flush=True)
+
+def logbar(itrble, desc):
+  """Print progress as log lines, at most every Progress.interval seconds."""
+  L  = len(itrble)
+  t0 = tl = time.time()
+  for k,i in enumerate(itrble):
+    yield i
+    now = time.time()
+    if now - tl > Progress.interval:
+      tl = now
+      _log_line(desc,k+1,L,t0)
+  _log_line(desc,L,L,t0)
 
-# Get progbar description by inspecting caller function.
-import inspect
 def pdesc(desc):
+  """Get progbar description (if None): Progress.local.desc, or the caller's name."""
   if desc is not None:
     return desc
-  try:
-    #stackoverflow.com/q/15608987
-    DAC_name  = inspect.stack()[3].frame.f_locals['name_hook']
-  except (KeyError, AttributeError):
-    #stackoverflow.com/a/900404
-    DAC_name  = inspect.stack()[2].function
-  return DAC_name 
+  if Progress.local.desc is not None:
+    return Progress.local.desc
+  return sys._getframe(2).f_code.co_name
 
 # Define progbar as tqdm or noobar
 try:
   import tqdm
-  def progbar(inds, desc=None, leave=1):
-    if is_notebook:
-      pb = tqdm.tqdm_notebook(inds,desc=pdesc(desc),leave=leave)
-    else:
-      pb = tqdm.tqdm(inds,desc=pdesc(desc),leave=leave,smoothing=0.3,dynamic_ncols=True)
-    # Printing during the progbar loop (may occur with error printing)
-    # can cause tqdm to freeze the entire execution. 
-    # Seemingly, this is caused by their multiprocessing-safe stuff.
-    # Disable this, as per github.com/tqdm/tqdm/issues/461#issuecomment-334343230
-    try: pb.get_lock().locks = []
-    except AttributeError: pass
-    return pb
 except ImportError as err:
   install_warn(err)
-  def progbar(inds, desc=None, leave=1):
-    return noobar(inds,desc=pdesc(desc))
+  tqdm = None
 
+def progbar(inds, desc=None, leave=1):
+  """
+  Wrap iterable inds in a progress reporter, as set by Progress.mode.
+  Within a sweep_progress(), the iterable is returned as is.
+  """
+  if Progress.mode=='off' or Progress.local.sweep is not None:
+    return inds
+  desc = pdesc(desc)
+  if Progress.mode=='log':
+    return logbar(inds,desc)
+  if tqdm is None:
+    return noobar(inds,desc)
+  if is_notebook:
+    pb = tqdm.tqdm_notebook(inds,desc=desc,leave=leave)
+  else:
+    pb = tqdm.tqdm(inds,desc=desc,leave=leave,smoothing=0.3,dynamic_ncols=True)
+  # Printing during the progbar loop (may occur with error printing)
+  # can cause tqdm to freeze the entire execution. 
+  # Seemingly, this is caused by their multiprocessing-safe stuff.
+  # Disable this, as per github.com/tqdm/tqdm/issues/461#issuecomment-334343230
+  try: pb.get_lock().locks = []
+  except AttributeError: pass
+  return pb
 
+import contextlib
+@contextlib.contextmanager
+def sweep_progress(total, desc='Sweep'):
+  """
+  Report the progress of a sweep (e.g. over settings, repeats, configs)
+  with a single bar (or log line), rather than one bar per experiment.
+  Each assimilation (assim_caller) in this thread counts as one step.
+  The progbars within the sweep are disabled.
+  Example:
+  >>> with sweep_progress(nRepeat*len(cfgs)):
+  >>>   for iR in range(nRepeat):
+  >>>     ...
+  """
+  local = Progress.local
+  prev  = local.sweep
+  if Progress.mode=='off':
+    local.sweep = lambda: None
+    pb = None
+  elif Progress.mode=='bar' and tqdm is not None:
+    pb = tqdm.tqdm(total=total,desc=desc,smoothing=0.3,dynamic_ncols=True)
+    local.sweep = lambda: pb.update(1)
+  else:
+    state = {'i':0, 't0':time.time(), 'tl':time.time()}
+    def step():
+      state['i'] += 1
+      now = time.time()
+      if now - state['tl'] > Progress.interval or state['i']==total:
+        state['tl'] = now
+        _log_line(desc,state['i'],total,state['t0'])
+    local.sweep = step
+    pb = None
+  try:
+    yield
+  finally:
+    local.sweep = prev
+    if pb is not None:
+      pb.close()
 
 
 #########################################
@@ -113,7 +200,6 @@ def print_c(*kargs,color='blue',**kwargs):
 
 
 # Local np.set_printoptions. stackoverflow.com/a/2891805/38281
-import contextlib
 @contextlib.contextmanager
 def printoptions(*args, **kwargs):
     original = np.get_printoptions()
@@ -511,7 +597,6 @@ def multiproc_map(func,xx,**kwargs):
 
 
 # Better than tic-toc !
-import time
 class Timer():
   """
   Usage:
@@ -531,6 +616,114 @@ class Timer():
       print('Elapsed: %s' % (time.time() - self.tstart))
 
 
+import threading
+class PhaseTimer():
+  """
+  Accumulate the (wall-clock) time spent in distinct phases
+  (e.g. 'forecast', 'analysis') of a computation.
+  Low overhead: a pair of perf_counter() calls per timed call.
+  Phases should not be nested (otherwise their time is counted twice).
+  Usage:
+  ptimer = PhaseTimer()
+  fun    = ptimer.wrap('forecast',fun)
+  ptimer.totals # --> {'forecast': seconds}
+
+  PhaseTimer.current() is the timer of the assimilation running
+  in the current thread (if any), to which functions decorated by timed()
+  are charged. It is set (in PhaseTimer.local) by assim_caller.
+  """
+  local = threading.local()
+
+  def __init__(self):
+    self.totals = OrderedDict()
+    self._lock  = threading.Lock()
+
+  def add(self,phase,t):
+    with self._lock:
+      self.totals[phase] = self.totals.get(phase,0) + t
+
+  @staticmethod
+  def current():
+    return getattr(PhaseTimer.local,'active',None)
+
+  def wrap(self,phase,fun):
+    @functools.wraps(fun)
+    def timed_fun(*args,**kwargs):
+      t0 = time.perf_counter()
+      try:
+        return fun(*args,**kwargs)
+      finally:
+        self.add(phase, time.perf_counter()-t0)
+    return timed_fun
+
+def timed(phase):
+  """Decorator: charge the time spent in the function to PhaseTimer.current()."""
+  def decorator(fun):
+    @functools.wraps(fun)
+    def timed_fun(*args,**kwargs):
+      ptimer = PhaseTimer.current()
+      if ptimer is None:
+        return fun(*args,**kwargs)
+      t0 = time.perf_counter()
+      try:
+        return fun(*args,**kwargs)
+      finally:
+        ptimer.add(phase, time.perf_counter()-t0)
+    return timed_fun
+  return decorator
+
+
+import threading, queue
+class BackgroundWorker():
+  """
+  Run jobs (fun,args,kwargs), in order, in a background (daemon) thread.
+  The queue is bounded (by maxsize), so that submit() blocks
+  (rather than piling up jobs) if the worker lags behind.
+  An exception in a job cancels the remaining jobs,
+  and is re-raised (in the submitting thread) by the next submit() or join().
+  """
+  def __init__(self,maxsize=2):
+    self.queue  = queue.Queue(maxsize)
+    self.error  = None
+    self.failed = False
+    self.thread = threading.Thread(target=self._run,daemon=True)
+    self.thread.start()
+
+  def _run(self):
+    while True:
+      job = self.queue.get()
+      if job is None:
+        break
+      if not self.failed:
+        fun, args, kwargs = job
+        try:
+          fun(*args,**kwargs)
+        except BaseException as ERR:
+          self.error, self.failed = ERR, True
+      self.queue.task_done()
+
+  def _raise(self):
+    if self.error is not None:
+      ERR, self.error = self.error, None
+      raise ERR
+
+  def submit(self,fun,*args,**kwargs):
+    self._raise()
+    self.queue.put((fun,args,kwargs))
+
+  def wait(self):
+    "Wait for the submitted jobs to finish."
+    self.queue.join()
+    self._raise()
+
+  def join(self,reraise=True):
+    "Wait for the submitted jobs to finish, and stop the thread."
+    self.queue.put(None)
+    self.thread.join()
+    if reraise:
+      self._raise()
+
+
 # stackoverflow.com/a/2669120
 def sorted_human( lst ): 
     """ Sort the given iterable in the way that humans expect.""" 
@@ -1,25 +1,33 @@
 from common import *
 
-#from mpl_toolkits.mplot3d import Axes3D
-from mpl_toolkits.mplot3d.art3d import juggle_axes
-
-from mpl_toolkits.axes_grid1 import make_axes_locatable
-from mpl_toolkits.axes_grid1.inset_locator import inset_axes
-
-from matplotlib import colors
-from matplotlib.ticker import MaxNLocator
+# NB: matplotlib modules are imported within the functions (i.e. upon use),
+#     so that importing DAPPER remains fast and headless.
 
 
 class LivePlot:
   """
   Live plotting functionality.
+
+  Rendering is throttled so as to not slow down the assimilation too much:
+  the figures are redrawn at most max_fps times per second (of wall-clock).
+  In the steps in between, only the (cheap) tracking of the traces
+  (diagnostics, 3D tails) is done. All figures are then drawn at once,
+  by a single (short) pause.
   """
+  # Render budget
+  max_fps = 10     # Max. number of redraws per second.
+  pause   = 0.001  # Duration of the pause (during which the figures are drawn).
   def __init__(self,stats,E=None,P=None,only=False,**kwargs):
     """
     Initialize plots.
      - only: (possible) fignums to plot.
     """
 
+    from mpl_toolkits.axes_grid1 import make_axes_locatable
+    from mpl_toolkits.axes_grid1.inset_locator import inset_axes
+    from matplotlib import colors
+    from matplotlib.ticker import MaxNLocator
+
     if isinstance(only,bool):
       only=range(99)
     #else: assume only is a list fo fignums
@@ -408,6 +416,7 @@ class LivePlot:
 
     self.prev_k = 0
     plot_pause(0.01)
+    self.t_drawn = time.time()
 
 
 
@@ -446,17 +455,21 @@ class LivePlot:
   def update(self,k,kObs,E=None,P=None,**kwargs):
     """Plot forecast state"""
     if self.skip_plotting(): return
+    from mpl_toolkits.mplot3d.art3d import juggle_axes
 
     stats = self.stats
     mu    = stats.mu
     m     = self.xx.shape[1]
 
+    # Only redraw if within the render budget. Otherwise, only track.
+    draw  = time.time() - self.t_drawn >= 1/self.max_fps
+
     ii,wrap = setup_wrapping(m)
     
     #####################
     # Dashboard
     #####################
-    if hasattr(self, 'fga') and plt.fignum_exists(self.fga.number):
+    if draw and hasattr(self, 'fga') and plt.fignum_exists(self.fga.number):
 
       plt.figure(self.fga.number)
       t = self.setup.t.tt[k]
@@ -536,8 +549,6 @@ class LivePlot:
         self.lmf.set_ydata(msft)
         update_ylim(msft, self.ax2)
 
-      plot_pause(0.01)
-
 
     #####################
     # Diagnostics
@@ -603,11 +614,11 @@ class LivePlot:
       update_axd(self.ax_d1,self.d1)
       update_axd(self.ax_d2,self.d2)
 
-      #if k%(chrono.pK/5) <= 1:
-      update_ylim([d['data'] for d in self.d1.values()], self.ax_d1,
-          bottom=0,      cC=0.2,cE=0.9)
-      update_ylim([d['data'] for d in self.d2.values()], self.ax_d2,
-          Max=4, Min=-4, cC=0.3,cE=0.9)
+      if draw:
+        update_ylim([d['data'] for d in self.d1.values()], self.ax_d1,
+            bottom=0,      cC=0.2,cE=0.9)
+        update_ylim([d['data'] for d in self.d2.values()], self.ax_d2,
+            Max=4, Min=-4, cC=0.3,cE=0.9)
 
       # Check which diagnostics are present
       if (not self.has_checked_presence) and (k>=chrono.kkObs[0]):
@@ -615,8 +626,6 @@ class LivePlot:
         rm_absent(self.ax_d2,self.d2)
         self.has_checked_presence = True
 
-      plot_pause(0.01)
-
 
     #####################
     # 3D phase space
@@ -636,32 +645,35 @@ class LivePlot:
         else:
           self.tail_mu[:] = mu[k,:3]
 
-      # Truth
-      self.sx._offsets3d = juggle_axes(*tp(self.xx[k,:3]),'z')
-      self.tail_xx       = roll_n_sub(self.tail_xx,self.xx[k,:3])
-      update_tail(self.ltx, self.tail_xx)
-
+      # Track tails
+      self.tail_xx = roll_n_sub(self.tail_xx,self.xx[k,:3])
       if hasattr(self, 'sE'):
-        # Ensemble
-        self.sE._offsets3d = juggle_axes(*E.T[:3],'z')
-
-        clrs  = self.sE.get_facecolor()[:,:3]
-        w     = stats.w[k]
-        alpha = (w/w.max()).clip(0.1,0.4)
-        if len(clrs) == 1: clrs = clrs.repeat(len(w),axis=0)
-        self.sE.set_color(np.hstack([clrs, alpha[:,None]]))
-        
-        self.tail_E = roll_n_sub(self.tail_E,E[:,:3])
-        for n in range(E.shape[0]):
-          update_tail(self.ltE[n],self.tail_E[:,n,:])
-          self.ltE[n].set_alpha(alpha[n])
+        self.tail_E  = roll_n_sub(self.tail_E,E[:,:3])
       else:
-        # Mean
-        self.smu._offsets3d = juggle_axes(*tp(mu[k,:3]),'z')
-        self.tail_mu        = roll_n_sub(self.tail_mu,mu[k,:3])
-        update_tail(self.ltmu, self.tail_mu)
+        self.tail_mu = roll_n_sub(self.tail_mu,mu[k,:3])
 
-      plot_pause(0.01)
+      if draw:
+        # Truth
+        self.sx._offsets3d = juggle_axes(*tp(self.xx[k,:3]),'z')
+        update_tail(self.ltx, self.tail_xx)
+
+        if hasattr(self, 'sE'):
+          # Ensemble
+          self.sE._offsets3d = juggle_axes(*E.T[:3],'z')
+
+          clrs  = self.sE.get_facecolor()[:,:3]
+          w     = stats.w[k]
+          alpha = (w/w.max()).clip(0.1,0.4)
+          if len(clrs) == 1: clrs = clrs.repeat(len(w),axis=0)
+          self.sE.set_color(np.hstack([clrs, alpha[:,None]]))
+
+          for n in range(E.shape[0]):
+            update_tail(self.ltE[n],self.tail_E[:,n,:])
+            self.ltE[n].set_alpha(alpha[n])
+        else:
+          # Mean
+          self.smu._offsets3d = juggle_axes(*tp(mu[k,:3]),'z')
+          update_tail(self.ltmu, self.tail_mu)
 
       # For animation:
       #self.fg3.savefig('figs/l63_' + str(k) + '.png',format='png',dpi=70)
@@ -670,7 +682,7 @@ class LivePlot:
     #####################
     # Weight histogram
     #####################
-    if kObs and hasattr(self, 'fgh') and plt.fignum_exists(self.fgh.number):
+    if draw and kObs and hasattr(self, 'fgh') and plt.fignum_exists(self.fgh.number):
       plt.figure(self.fgh.number)
       axh      = self.axh
       _        = [b.remove() for b in self.hst]
@@ -686,18 +698,25 @@ class LivePlot:
       axh.set_title('N: {:d}.   N_eff: {:.4g}.   Not shown: {:d}. '.\
           format(N, 1/(w@w), N-nC))
       update_ylim([nn], axh, cC=True)
-      plot_pause(0.01)
 
 
 
     #####################
     # User-defined state
     #####################
-    if hasattr(self,'fgu') and plt.fignum_exists(self.fgu.number):
+    if draw and hasattr(self,'fgu') and plt.fignum_exists(self.fgu.number):
       plt.figure(self.fgu.number)
       self.setter_truth(self.xx[k])
       self.setter_mean(mu[k])
-      plot_pause(0.01)
+
+    # Draw all (changed) figures at once
+    if draw:
+      for name in ['fga','fgd','fg3','fgh','fgu']:
+        fig = getattr(self,name,None)
+        if fig is not None and fig.stale:
+          fig.canvas.draw_idle()
+      plot_pause(self.pause)
+      self.t_drawn = time.time()
 
     # Trackers
     self.prev_k = k
@@ -1041,6 +1060,7 @@ def plot_err_components(stats):
         the singular values (svals) correspond to rotated MADs,
         and because rms(umisf) seems to convoluted for interpretation.
   """
+  from matplotlib.ticker import MaxNLocator
   fgE = plt.figure(15,figsize=(6,6)).clf()
   set_figpos('1312 mac')
 
@@ -1235,9 +1255,9 @@ def set_figpos(loc):
 
 
 # stackoverflow.com/a/7396313
-from matplotlib import transforms as mtransforms
 def autoscale_based_on(ax, line_handles):
   "Autoscale axis based (only) on line_handles."
+  from matplotlib import transforms as mtransforms
   ax.dataLim = mtransforms.Bbox.unit()
   for iL,lh in enumerate(line_handles):
     xy = np.vstack(lh.get_data()).T
@@ -1245,7 +1265,6 @@ def autoscale_based_on(ax, line_handles):
   ax.autoscale_view()
 
 
-from matplotlib.widgets import CheckButtons
 import textwrap
 def toggle_lines(ax=None,autoscl=True,numbering=False,txtwidth=15,txtsize=None,state=None):
   """
@@ -1257,6 +1276,7 @@ def toggle_lines(ax=None,autoscl=True,numbering=False,txtwidth=15,txtsize=None,s
   State of checkboxes can be inquired by 
   OnOff = [lh.get_visible() for lh in ax.findobj(lambda x: isinstance(x,mpl.lines.Line2D))[::2]]
   """
+  from matplotlib.widgets import CheckButtons
 
   if ax is None: ax = plt.gca()
   if txtsize is None: txtsize = mpl.rcParams['font.size']